@@ -20,7 +20,7 @@ from typing import Dict, List, Optional
 
 from dotenv import load_dotenv
 
-from core.memory_system import BrandMemory, FeedbackManager, PostsHistory
+from core.memory_system import BrandMemory, FeedbackManager, create_posts_history
 from core.prompt_builder import Platform, ContentGoal, ContentStyle
 from core.model_router import ModelRouter
 from core.agent_engine import AgentEngine, AgentResult
@@ -193,7 +193,7 @@ def init_session_state():
         st.session_state.initialized = True
         st.session_state.brand_memory = BrandMemory()
         st.session_state.feedback_manager = FeedbackManager()
-        st.session_state.posts_history = PostsHistory()
+        st.session_state.posts_history = create_posts_history()
         st.session_state.campaign_results = {}
         st.session_state.current_graphics = {}
         st.session_state.generation_count = 0
@@ -2685,7 +2685,7 @@ def render_settings_tab():
                     st.caption(f"Score: {post.get('score', 'N/A')}/10")
         
         if st.button("🗑️ Wyczyść historię", key="clear_history"):
-            st.session_state.posts_history = PostsHistory()
+            st.session_state.posts_history = create_posts_history()
             st.toast("Historia wyczyszczona", icon="🗑️")
     
     # === API & DEBUG ===
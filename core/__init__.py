@@ -1,9 +1,28 @@
 """
 AI Marketing Agent - Core Module
 """
-from .memory_system import BrandMemory, FeedbackManager
-from .agent_engine import AgentEngine
-from .prompt_builder import PromptBuilder
-from .model_router import ModelRouter
+from importlib import import_module
 
-__version__ = "2.0.0"
\ No newline at end of file
+__version__ = "2.0.0"
+
+# Eksporty ładowane leniwie (PEP 562) - `import core.prompt_builder`
+# nie wciąga routera, asyncio ani pamięci marki
+_EXPORTS = {
+    "BrandMemory": ".memory_system",
+    "FeedbackManager": ".memory_system",
+    "MemorySystem": ".memory_system",
+    "AgentEngine": ".agent_engine",
+    "PromptBuilder": ".prompt_builder",
+    "ModelRouter": ".model_router",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
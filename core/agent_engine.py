@@ -7,8 +7,12 @@ Agent Engine - Wieloetapowy silnik agenta AI
 """
 
 import json
+import asyncio
+import hashlib
 import logging
+import threading
 import time
+from contextlib import contextmanager
 from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
@@ -20,8 +24,8 @@ from .prompt_builder import (
     ContentGoal, 
     ContentStyle
 )
-from .model_router import ModelRouter, TaskType, APIResponse
-from .memory_system import BrandMemory, FeedbackManager, PostsHistory
+from .model_router import ModelRouter, TaskType, APIResponse, TokenBucket
+from .memory_system import BrandMemory, FeedbackManager, PostsHistory, create_posts_history
 
 logger = logging.getLogger(__name__)
 
@@ -82,16 +86,24 @@ class AgentResult:
     logs: List[AgentLog]
     state: PipelineState
     error: str = ""
+    _formatted_logs: Optional[List[str]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
     
     def get_logs_formatted(self) -> List[str]:
-        """Zwraca logi jako sformatowane stringi"""
-        formatted = []
-        for log in self.logs:
-            line = f"{log.emoji} {log.agent_name}: {log.message}"
-            if log.duration_ms > 0:
-                line += f" ({log.duration_ms}ms)"
-            formatted.append(line)
-        return formatted
+        """
+        Zwraca logi jako sformatowane stringi.
+        Liczone raz - wyświetlanie, Markdown i JSON dostają tę samą listę.
+        """
+        if self._formatted_logs is None:
+            formatted = []
+            for log in self.logs:
+                line = f"{log.emoji} {log.agent_name}: {log.message}"
+                if log.duration_ms > 0:
+                    line += f" ({log.duration_ms}ms)"
+                formatted.append(line)
+            self._formatted_logs = formatted
+        return self._formatted_logs
 
 
 class AgentEngine:
@@ -145,16 +157,72 @@ class AgentEngine:
         router: ModelRouter = None,
         brand_memory: BrandMemory = None,
         feedback_manager: FeedbackManager = None,
-        posts_history: PostsHistory = None
+        posts_history: PostsHistory = None,
+        warmup: bool = False,
+        rate_limiter: "RateLimiter" = None
     ):
         self.router = router or ModelRouter()
         self.prompt_builder = PromptBuilder()
         self.brand_memory = brand_memory or BrandMemory()
         self.feedback_manager = feedback_manager or FeedbackManager()
-        self.posts_history = posts_history or PostsHistory()
+        self.posts_history = posts_history or create_posts_history()
+        
+        # Limit wywołań LLM na minutę dla całego silnika (opcjonalny)
+        self.rate_limiter = rate_limiter
+        # Limit bieżącego wątku - pipeline'y CampaignBuilder używają limitu buildera
+        self._local = threading.local()
+        
+        # Rozgrzewka modeli w tle - opcjonalna, bo zużywa zapytania z limitu providera
+        self._warmed = False
+        if warmup:
+            self.warmup()
         
         logger.info("Agent Engine initialized")
     
+    def warmup(self):
+        """Uruchamia w tle rozgrzewkę modeli agentów (najwyżej raz na instancję)"""
+        if self._warmed:
+            return
+        self._warmed = True
+        threading.Thread(target=self._warmup, daemon=True).start()
+    
+    def _warmup(self):
+        """
+        Wysyła przez router 1-tokenowe zapytanie dla każdego typu zadania agentów,
+        żeby pierwsze prawdziwe wywołanie nie płaciło za zimny start.
+        Limit zapytań i stan providerów obsługuje router; błędy są ignorowane.
+        """
+        task_types = {agent["task_type"] for agent in self.AGENTS.values()}
+        for task_type in task_types:
+            try:
+                self.router.call_simple(
+                    system_prompt="",
+                    user_prompt="ping",
+                    task_type=task_type,
+                    max_tokens=1
+                )
+            except Exception as e:
+                logger.debug(f"Warmup failed for {task_type}: {e}")
+        
+        logger.info(f"Warmup done: {len(task_types)} task types")
+    
+    @contextmanager
+    def using_rate_limiter(self, rate_limiter: "RateLimiter"):
+        """Wywołania LLM z bieżącego wątku idą przez podany limiter zamiast self.rate_limiter"""
+        previous = getattr(self._local, "rate_limiter", None)
+        self._local.rate_limiter = rate_limiter
+        try:
+            yield
+        finally:
+            self._local.rate_limiter = previous
+    
+    def _llm_call(self, **kwargs) -> APIResponse:
+        """Wywołanie LLM przez router - z limitem wywołań na minutę, jeśli ustawiony"""
+        rate_limiter = getattr(self._local, "rate_limiter", None) or self.rate_limiter
+        if rate_limiter:
+            rate_limiter.acquire()
+        return self.router.call_simple(**kwargs)
+    
     def _call_agent(
         self,
         agent_role: str,
@@ -186,7 +254,7 @@ class AgentEngine:
         )
         
         # Wywołaj model
-        response = self.router.call_simple(
+        response = self._llm_call(
             system_prompt=system_prompt,
             user_prompt=user_prompt,
             task_type=task_type,
@@ -273,9 +341,7 @@ class AgentEngine:
         has_positive = any(marker in lower_result for marker in positive_markers)
         
         # Dodatkowo: sprawdź zakazane słowa bezpośrednio
-        forbidden = self.brand_memory.dna.get("forbidden_words", [])
-        content_lower = content.lower()
-        found_forbidden = [word for word in forbidden if word.lower() in content_lower]
+        found_forbidden = self.brand_memory.find_forbidden(content)
         
         if found_forbidden:
             return False, f"Znaleziono zakazane słowa: {', '.join(found_forbidden)}"
@@ -383,7 +449,22 @@ class AgentEngine:
             current_content = draft
             
             # === KROK 3: CRITIC (iteracyjnie) ===
+            # Cache ocen po hashu treści - ta sama treść dostałaby tę samą ocenę
+            critic_cache: Dict[str, Tuple[float, str]] = {}
+            
             for iteration in range(self.MAX_ITERATIONS):
+                content_hash = hashlib.sha1(current_content.encode("utf-8")).hexdigest()
+                cached = critic_cache.get(content_hash)
+                if cached:
+                    state.critique_score, state.critique = cached
+                    logs.append(AgentLog(
+                        step=AgentStep.CRITIQUE,
+                        agent_name="Critic",
+                        emoji="♻️",
+                        message="Editor nie zmienił treści - pomijam ponowną ocenę"
+                    ))
+                    break
+                
                 state.iterations = iteration + 1
                 
                 logs.append(AgentLog(
@@ -402,6 +483,8 @@ class AgentEngine:
                 
                 state.critique = critique
                 state.critique_score = self._extract_score(critique)
+                if critique:
+                    critic_cache[content_hash] = (state.critique_score, critique)
                 
                 logs.append(AgentLog(
                     step=AgentStep.CRITIQUE,
@@ -640,6 +723,8 @@ class AgentEngine:
     ) -> List[AgentResult]:
         """
         Generuje wiele wariantów tego samego posta.
+        Wszystkie warianty powstają w jednym wywołaniu modelu (JSON),
+        a przy błędzie parsowania - osobno dla każdego stylu.
         """
         if styles is None:
             styles = [
@@ -647,54 +732,222 @@ class AgentEngine:
                 ContentStyle.CASUAL,
                 ContentStyle.CONTROVERSIAL
             ]
-        
+
+        styles = styles[:count]
+
+        if len(styles) > 1:
+            results = self._generate_variations_batch(topic, platform, styles)
+            if results:
+                return results
+            logger.warning("Batch variations failed, falling back to per-style calls")
+
         results = []
-        
-        for i, style in enumerate(styles[:count]):
+
+        for i, style in enumerate(styles):
             result = self.run_quick(topic, platform, style)
             results.append(result)
-        
+
+        return results
+
+    def _generate_variations_batch(
+        self,
+        topic: str,
+        platform: Platform,
+        styles: List[ContentStyle]
+    ) -> Optional[List[AgentResult]]:
+        """
+        Generuje wszystkie warianty jednym wywołaniem modelu.
+
+        Returns:
+            Lista wyników lub None gdy odpowiedź nie jest poprawnym JSON-em
+        """
+        agent_config = self.AGENTS["copywriter"]
+        start_time = time.time()
+
+        context = PromptContext(
+            topic=topic,
+            platform=platform,
+            goal=ContentGoal.ENGAGEMENT,
+            # Wspólny system prompt bez sekcji STYL - style wariantów opisuje user prompt
+            style=None,
+            brand_context=self.brand_memory.get_prompt_context()
+        )
+
+        system_prompt = self.prompt_builder.build_system_prompt("copywriter", context)
+        user_prompt = self.prompt_builder.build_variations_prompt(context, styles)
+
+        response = self._llm_call(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            task_type=agent_config["task_type"],
+            temperature=agent_config["temperature"],
+            max_tokens=2048 * len(styles)
+        )
+
+        if not response.success:
+            return None
+
+        variants = self._parse_variants(response.content, len(styles))
+        if variants is None:
+            return None
+
+        duration = int((time.time() - start_time) * 1000)
+
+        results = []
+        for style, content in zip(styles, variants):
+            state = PipelineState(
+                topic=topic,
+                platform=platform,
+                goal=ContentGoal.ENGAGEMENT,
+                style=style,
+                final_content=content,
+                total_duration_ms=duration
+            )
+            log = AgentLog(
+                step=AgentStep.COPYWRITING,
+                agent_name="Batch Mode",
+                emoji=agent_config["emoji"],
+                message=f"Wariant {style.value} ({len(styles)} w jednym wywołaniu)",
+                duration_ms=duration,
+                model_used=response.model_used
+            )
+            results.append(AgentResult(
+                success=bool(content),
+                content=content,
+                platform=platform.value,
+                logs=[log],
+                state=state,
+                error="" if content else "Generation failed"
+            ))
+
         return results
 
+    def _parse_variants(self, text: str, expected: int) -> Optional[List[str]]:
+        """Wyciąga listę wariantów z odpowiedzi JSON modelu"""
+        start = text.find("{")
+        end = text.rfind("}")
+        if start == -1 or end <= start:
+            return None
+
+        try:
+            data = json.loads(text[start:end + 1])
+        except json.JSONDecodeError:
+            return None
+
+        variants = data.get("variants") if isinstance(data, dict) else None
+        if not isinstance(variants, list) or len(variants) != expected:
+            return None
+        if not all(isinstance(v, str) for v in variants):
+            return None
+
+        return [v.strip() for v in variants]
+
+
+class RateLimiter:
+    """
+    Limit wywołań LLM na minutę (bezpieczny wątkowo) - token bucket:
+    krótkie serie przechodzą od razu, potem wywołania czekają na odnowienie.
+    """
+
+    def __init__(self, rate: int = 60):
+        self.bucket = TokenBucket(capacity=rate, refill_rate=rate / 60) if rate > 0 else None
+
+    def acquire(self):
+        """Blokuje do czasu, aż wywołanie zmieści się w limicie"""
+        while self.bucket and not self.bucket.try_acquire():
+            time.sleep(max(0.01, self.bucket.wait_time()))
+
 
 class CampaignBuilder:
     """
     Buduje kampanie wieloplatformowe.
     Generuje spójną narrację na różne platformy.
+    Platformy generowane są równolegle, z limitem współbieżności i rpm.
+    Limity należą do buildera - obowiązują wszystkie kampanie budowane naraz.
     """
     
-    def __init__(self, agent_engine: AgentEngine):
+    def __init__(
+        self,
+        agent_engine: AgentEngine,
+        max_concurrency: int = 4,
+        rpm: Optional[int] = None
+    ):
         self.engine = agent_engine
+        self.max_concurrency = max_concurrency
+        # Domyślnie limit głównego providera (np. 30/min na darmowym planie Groq)
+        self.rpm = rpm if rpm is not None else agent_engine.router.requests_per_minute()
+        
+        # Maks. max_concurrency pipeline'ów naraz (semafor wątkowy - niezależny od pętli zdarzeń)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        
+        # Limit rpm dotyczy każdego wywołania LLM pipeline'ów buildera, nie ich startów.
+        # Silnik może być współdzielony - limit buildera obowiązuje tylko w jego wątkach.
+        self.rate_limiter = RateLimiter(self.rpm)
     
     def build_campaign(
         self,
         topic: str,
         platforms: List[Platform],
         goal: ContentGoal = ContentGoal.ENGAGEMENT,
-        style: ContentStyle = ContentStyle.PROFESSIONAL
+        style: ContentStyle = ContentStyle.PROFESSIONAL,
+        quick: bool = False
     ) -> Dict[str, AgentResult]:
         """
         Generuje kampanię na wiele platform.
         
+        Args:
+            quick: Tryb szybki (run_quick zamiast pełnego pipeline'u)
+        
         Returns:
             Dict z wynikami dla każdej platformy
         """
-        results = {}
-        
-        # Najpierw wygeneruj główną strategię
-        primary_platform = platforms[0] if platforms else Platform.LINKEDIN
-        
-        for platform in platforms:
-            logger.info(f"Generating for: {platform.value}")
-            result = self.engine.run_pipeline(
-                topic=topic,
-                platform=platform,
-                goal=goal,
-                style=style
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(
+                self.build_campaign_async(topic, platforms, goal, style, quick)
             )
-            results[platform.value] = result
+        raise RuntimeError(
+            "build_campaign() nie działa wewnątrz pętli zdarzeń - "
+            "użyj `await build_campaign_async(...)`"
+        )
+    
+    async def build_campaign_async(
+        self,
+        topic: str,
+        platforms: List[Platform],
+        goal: ContentGoal = ContentGoal.ENGAGEMENT,
+        style: ContentStyle = ContentStyle.PROFESSIONAL,
+        quick: bool = False
+    ) -> Dict[str, AgentResult]:
+        """
+        Asynchroniczna wersja build_campaign.
+        Pipeline'y działają w wątkach, ograniczone semaforem buildera i limiterem rpm.
+        """
+        def run_for_platform(platform: Platform) -> AgentResult:
+            with self._slots, self.engine.using_rate_limiter(self.rate_limiter):
+                logger.info(f"Generating for: {platform.value}")
+                if quick:
+                    return self.engine.run_quick(
+                        topic=topic,
+                        platform=platform,
+                        style=style
+                    )
+                return self.engine.run_pipeline(
+                    topic=topic,
+                    platform=platform,
+                    goal=goal,
+                    style=style
+                )
         
-        return results
+        results = await asyncio.gather(
+            *(asyncio.to_thread(run_for_platform, platform) for platform in platforms)
+        )
+        
+        return {
+            platform.value: result
+            for platform, result in zip(platforms, results)
+        }
     
     def build_content_series(
         self,
@@ -708,14 +961,15 @@ class CampaignBuilder:
         """
         results = []
         
-        for i, subtopic in enumerate(subtopics):
-            full_topic = f"{main_topic} - Część {i+1}: {subtopic}"
-            result = self.engine.run_pipeline(
-                topic=full_topic,
-                platform=platform,
-                goal=goal
-            )
-            results.append(result)
+        with self.engine.using_rate_limiter(self.rate_limiter):
+            for i, subtopic in enumerate(subtopics):
+                full_topic = f"{main_topic} - Część {i+1}: {subtopic}"
+                result = self.engine.run_pipeline(
+                    topic=full_topic,
+                    platform=platform,
+                    goal=goal
+                )
+                results.append(result)
         
         return results
 
@@ -6,25 +6,230 @@ Memory System - Pamięć długoterminowa agenta
 """
 
 import os
+import copy
 import json
+import mmap
+import sqlite3
 import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from functools import cached_property
+from itertools import islice
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set, Iterator, Deque, Union
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # orjson jest opcjonalny - fallback na stdlib json
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard jest opcjonalny - pliki zapisywane bez kompresji
+    zstandard = None
+
 # Konfiguracja logowania
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Ścieżka do folderu data
+# Ścieżka do folderu data (tworzony przy pierwszym zapisie)
 DATA_DIR = Path(__file__).parent.parent / "data"
-DATA_DIR.mkdir(exist_ok=True)
+
+# Pliki większe niż próg zapisywane są skompresowane zstd (jeśli dostępny) jako <plik>.zst
+COMPRESS_THRESHOLD = 64 * 1024
+ZSTD_LEVEL = 3
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# (monotonic, isoformat) ostatniego odczytu zegara
+_last_timestamp = (float("-inf"), "")
+
+
+def _now_iso() -> str:
+    """
+    Aktualny czas jako ISO string.
+    Wywołania w obrębie 1 ms dostają ten sam (cache'owany) string.
+    """
+    global _last_timestamp
+    now = time.monotonic()
+    last_mono, last_iso = _last_timestamp
+    if now - last_mono <= 0.001:
+        return last_iso
+    iso = datetime.now().isoformat()
+    _last_timestamp = (now, iso)
+    return iso
+
+
+def _preview(text: str, limit: int = 200) -> str:
+    """Skrót treści do zapisania w feedbacku"""
+    return text if len(text) <= limit else f"{text[:limit]}..."
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serializuje do JSON (UTF-8, wcięcie 2) - orjson jeśli dostępny"""
+    # default=list: deque z limitowanych list zapisuje się jako zwykła lista
+    if orjson is not None:
+        return orjson.dumps(
+            obj, default=list, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(obj, ensure_ascii=False, indent=2, default=list).encode("utf-8")
+
+
+def _loads(data: bytes) -> Any:
+    """Parsuje JSON - orjson jeśli dostępny"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class CompressedFileError(RuntimeError):
+    """Plik danych jest skompresowany zstd, a pakiet zstandard nie jest zainstalowany"""
+
+
+def _zst_path(filepath: Path) -> Path:
+    """Ścieżka skompresowanej wersji pliku danych (np. feedback.json.zst)"""
+    return filepath.with_name(filepath.name + ".zst")
+
+
+def _data_file(filepath: Path) -> Optional[Path]:
+    """Aktualny plik danych: nowszy z <plik> i <plik>.zst (None gdy brak obu)"""
+    existing = [path for path in (filepath, _zst_path(filepath)) if path.exists()]
+    if not existing:
+        return None
+    return max(existing, key=lambda path: path.stat().st_mtime)
 
 
-class BrandMemory:
+def _write_data(filepath: Path, data: bytes):
+    """
+    Zapisuje plik danych JSON. Duże pliki (z zstandard) trafiają do <plik>.zst,
+    małe zostają zwykłym, edytowalnym JSON-em pod nazwą <plik>.
+    """
+    compressed = zstandard is not None and len(data) >= COMPRESS_THRESHOLD
+    if compressed:
+        target, stale = _zst_path(filepath), filepath
+        data = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    else:
+        target, stale = filepath, _zst_path(filepath)
+    _write_atomic(target, data)
+    
+    # Druga wersja jest nieaktualna. Bez zstandard .zst zostaje (nie da się go
+    # odczytać, a nowszy JSON i tak ma pierwszeństwo przy wczytywaniu).
+    if zstandard is not None:
+        stale.unlink(missing_ok=True)
+
+
+def _read_file(filepath: Path) -> bytes:
+    """
+    Czyta plik danych - skompresowany rozpoznawany po nagłówku zstd,
+    więc stare nieskompresowane pliki czytają się bez zmian.
+    """
+    data = filepath.read_bytes()
+    if not data.startswith(_ZSTD_MAGIC):
+        return data
+    if zstandard is None:
+        raise CompressedFileError(f"{filepath.name} jest skompresowany - zainstaluj zstandard")
+    try:
+        return zstandard.ZstdDecompressor().decompress(data)
+    except zstandard.ZstdError as e:
+        # Traktuj jak uszkodzony JSON - plik trafi do kwarantanny
+        raise json.JSONDecodeError(f"Uszkodzony plik zstd: {e}", "", 0)
+
+
+def _write_atomic(filepath: Path, data: bytes):
+    """
+    Zapisuje plik atomowo: pełna treść trafia do pliku .tmp jednym
+    write(2), potem os.replace podmienia go w miejsce docelowego.
+    Przerwany zapis nigdy nie zostawia uciętego JSON-a.
+    """
+    tmp_path = filepath.with_name(filepath.name + ".tmp")
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, filepath)
+
+
+def _quarantine(filepath: Path) -> Path:
+    """Odkłada uszkodzony plik na bok (zamiast go nadpisywać)"""
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    target = filepath.with_name(f"{filepath.name}.corrupt-{stamp}")
+    os.replace(filepath, target)
+    logger.warning(f"Uszkodzony plik przeniesiony do {target.name}")
+    return target
+
+
+def _iter_lines(filepath: Path) -> Iterator[bytes]:
+    """
+    Iteruje po liniach pliku przez mmap - bez wczytywania całego pliku
+    do jednego bufora.
+    """
+    with open(filepath, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = 0
+            size = len(mm)
+            while pos < size:
+                end = mm.find(b"\n", pos)
+                if end == -1:
+                    end = size
+                yield mm[pos:end]
+                pos = end + 1
+
+
+def _dumps_line(obj: Any) -> bytes:
+    """Serializuje do jednej linii JSON Lines (z końcowym znakiem nowej linii)"""
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+class BatchedWrites:
+    """
+    Grupowanie zapisów: wewnątrz `with store.batch():` wywołania _save()
+    tylko oznaczają zmiany, a plik zapisywany jest raz przy wyjściu.
+    """
+    
+    _batch_depth = 0
+    _dirty = False
+    
+    def batch(self):
+        """Zwraca kontekst grupujący zapisy"""
+        return self
+    
+    def __enter__(self):
+        self._batch_depth += 1
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self._batch_depth -= 1
+        if self._batch_depth == 0 and self._dirty:
+            self._dirty = False
+            self._save()
+        return False
+    
+    def _defer_save(self) -> bool:
+        """True jeśli zapis ma zostać odłożony do końca batcha"""
+        if self._batch_depth > 0:
+            self._dirty = True
+            return True
+        return False
+
+
+class BrandMemory(BatchedWrites):
     """
     Przechowuje DNA marki - tożsamość, ton, zasady.
     Agent ZAWSZE uwzględnia te ustawienia.
+    
+    Listy w DEFAULT_DNA są krotkami - jeden niezmienny obiekt współdzielony
+    przez wszystkie instancje; instancja dostaje własne listy przy tworzeniu.
     """
     
     DEFAULT_DNA = {
@@ -34,14 +239,14 @@ class BrandMemory:
         # Ton i styl
         "tone_of_voice": "Ekspercki, ale przystępny",
         "formality_level": "medium",  # low, medium, high
-        "personality_traits": ["profesjonalny", "pomocny", "konkretny"],
+        "personality_traits": ("profesjonalny", "pomocny", "konkretny"),
         
         # Zasady treści
-        "forbidden_words": [
+        "forbidden_words": (
             "innowacyjny", "dynamiczny", "game-changer", 
             "witajcie", "w dzisiejszym świecie", "synergiczny"
-        ],
-        "preferred_phrases": [],
+        ),
+        "preferred_phrases": (),
         
         # Formatowanie
         "emoji_policy": "minimal",  # none, minimal, moderate, heavy
@@ -51,8 +256,8 @@ class BrandMemory:
         
         # Grupa docelowa
         "target_audience": "Profesjonaliści IT, deweloperzy, tech leads",
-        "audience_pain_points": [],
-        "audience_goals": [],
+        "audience_pain_points": (),
+        "audience_goals": (),
         
         # Preferencje długości
         "preferred_length": {
@@ -66,41 +271,68 @@ class BrandMemory:
         "updated_at": None
     }
     
+    # DEFAULT_DNA zserializowane raz - parsowanie daje świeże listy dla instancji
+    _DEFAULT_DNA_BYTES = _dumps(DEFAULT_DNA)
+    
     def __init__(self, filename: str = "brand_dna.json"):
         self.filepath = DATA_DIR / filename
-        self.dna = self._load()
-        logger.info(f"Brand DNA załadowane: {self.dna['brand_name']}")
+        self._prompt_cache: Optional[str] = None
+        self._forbidden_set: Optional[Set[str]] = None
+    
+    @cached_property
+    def dna(self) -> Dict[str, Any]:
+        """DNA marki - plik wczytywany przy pierwszym dostępie"""
+        dna = self._load()
+        logger.info(f"Brand DNA załadowane: {dna['brand_name']}")
+        return dna
     
     def _load(self) -> Dict[str, Any]:
         """Ładuje DNA z pliku lub tworzy domyślne"""
-        if self.filepath.exists():
+        filepath = _data_file(self.filepath)
+        if filepath is not None:
             try:
-                with open(self.filepath, "r", encoding="utf-8") as f:
-                    saved_dna = json.load(f)
-                    # Merge z domyślnymi (na wypadek nowych pól)
-                    merged = {**self.DEFAULT_DNA, **saved_dna}
-                    return merged
+                saved_dna = _loads(_read_file(filepath))
+                # Uzupełnij brakujące pola domyślnymi (na wypadek nowych pól)
+                for key, value in self.DEFAULT_DNA.items():
+                    if key not in saved_dna:
+                        saved_dna[key] = self._default_value(value)
+                return saved_dna
+            except CompressedFileError as e:
+                logger.error(f"{e} - używam domyślnego DNA")
+                return self._create_default()
             except json.JSONDecodeError:
                 logger.warning("Błąd odczytu brand_dna.json, tworzę nowy")
+                _quarantine(filepath)
                 return self._create_default()
         return self._create_default()
     
     def _create_default(self) -> Dict[str, Any]:
-        """Tworzy domyślne DNA"""
-        dna = self.DEFAULT_DNA.copy()
-        dna["created_at"] = datetime.now().isoformat()
-        dna["updated_at"] = datetime.now().isoformat()
-        self._save(dna)
+        """
+        Tworzy domyślne DNA.
+        Plik powstaje dopiero przy pierwszej zmianie - niezmienione
+        domyślne DNA nie musi być zapisywane.
+        """
+        dna = _loads(self._DEFAULT_DNA_BYTES)
+        dna["created_at"] = dna["updated_at"] = _now_iso()
         return dna
     
-    def _save(self, dna: Dict[str, Any] = None):
+    @staticmethod
+    def _default_value(value: Any) -> Any:
+        """Kopia wartości domyślnej do edycji - krotki zamieniane na listy"""
+        if isinstance(value, tuple):
+            return list(value)
+        return copy.deepcopy(value)
+    
+    def _save(self):
         """Zapisuje DNA do pliku"""
-        if dna is None:
-            dna = self.dna
-        dna["updated_at"] = datetime.now().isoformat()
+        # Każda zmiana DNA przechodzi przez _save - unieważnij cache
+        self._prompt_cache = None
+        self._forbidden_set = None
+        if self._defer_save():
+            return
+        self.dna["updated_at"] = _now_iso()
         
-        with open(self.filepath, "w", encoding="utf-8") as f:
-            json.dump(dna, f, ensure_ascii=False, indent=2)
+        _write_data(self.filepath, _dumps(self.dna))
         logger.info("Brand DNA zapisane")
     
     def update(self, key: str, value: Any) -> bool:
@@ -119,29 +351,50 @@ class BrandMemory:
                 self.dna[key] = value
         self._save()
     
+    @property
+    def forbidden_set(self) -> Set[str]:
+        """Zakazane słowa jako zbiór (lowercase) - O(1) sprawdzanie"""
+        if self._forbidden_set is None:
+            self._forbidden_set = {w.lower() for w in self.dna["forbidden_words"]}
+        return self._forbidden_set
+    
+    def has_forbidden(self, word: str) -> bool:
+        """Czy słowo/fraza jest na liście zakazanych"""
+        return word.lower().strip() in self.forbidden_set
+    
+    def find_forbidden(self, text: str) -> List[str]:
+        """Zwraca zakazane słowa/frazy występujące w tekście (w kolejności z DNA)"""
+        text_lower = text.lower()
+        return [word for word in self.dna["forbidden_words"] if word.lower() in text_lower]
+    
     def add_forbidden_word(self, word: str):
         """Dodaje słowo do listy zakazanych"""
         word = word.lower().strip()
-        if word not in self.dna["forbidden_words"]:
+        if word not in self.forbidden_set:
             self.dna["forbidden_words"].append(word)
             self._save()
     
     def remove_forbidden_word(self, word: str):
         """Usuwa słowo z listy zakazanych"""
         word = word.lower().strip()
-        if word in self.dna["forbidden_words"]:
-            self.dna["forbidden_words"].remove(word)
+        if word in self.forbidden_set:
+            self.dna["forbidden_words"] = [
+                w for w in self.dna["forbidden_words"] if w.lower() != word
+            ]
             self._save()
     
     def get_prompt_context(self) -> str:
         """
         Zwraca sformatowany kontekst dla promptów.
-        Używane przez AgentEngine.
+        Używane przez AgentEngine. Wynik jest cache'owany do następnej zmiany DNA.
         """
+        if self._prompt_cache is not None:
+            return self._prompt_cache
+        
         forbidden = ", ".join(self.dna["forbidden_words"]) or "brak"
         traits = ", ".join(self.dna["personality_traits"]) or "profesjonalny"
         
-        return f"""
+        self._prompt_cache = f"""
 === BRAND DNA ===
 Marka: {self.dna['brand_name']}
 Ton głosu: {self.dna['tone_of_voice']}
@@ -156,76 +409,90 @@ ZASADY:
 - Polityka hashtagów: {self.dna['hashtag_policy']} (max {self.dna['max_hashtags']})
 =================
 """
+        return self._prompt_cache
     
     def to_dict(self) -> Dict[str, Any]:
         """Zwraca kopię DNA jako słownik"""
         return self.dna.copy()
 
 
-class FeedbackManager:
+class FeedbackManager(BatchedWrites):
     """
     Zarządza feedbackiem użytkownika.
     Uczy agenta co jest dobre, a co złe.
     """
     
+    MAX_ENTRIES = 50
+    
     def __init__(self, filename: str = "feedback.json"):
         self.filepath = DATA_DIR / filename
-        self.feedback_data = self._load()
+        self._learn_cache: Dict[Optional[str], str] = {}
+    
+    @cached_property
+    def feedback_data(self) -> Dict[str, Any]:
+        """Dane feedbacku - plik wczytywany przy pierwszym dostępie"""
+        return self._load()
     
     def _load(self) -> Dict[str, Any]:
         """Ładuje historię feedbacku"""
-        if self.filepath.exists():
+        data = None
+        filepath = _data_file(self.filepath)
+        if filepath is not None:
             try:
-                with open(self.filepath, "r", encoding="utf-8") as f:
-                    return json.load(f)
+                data = _loads(_read_file(filepath))
+            except CompressedFileError as e:
+                logger.error(f"{e} - zaczynam z pustym feedbackiem")
             except json.JSONDecodeError:
                 logger.warning("Błąd odczytu feedback.json")
+                _quarantine(filepath)
         
-        return {
-            "positive": [],  # Posty które się podobały
-            "negative": [],  # Posty które się nie podobały
-            "adjustments": [],  # Konkretne korekty (np. "krótsze", "mniej emoji")
-            "stats": {
-                "total_positive": 0,
-                "total_negative": 0,
-                "total_adjustments": 0
+        if data is None:
+            data = {
+                "positive": [],  # Posty które się podobały
+                "negative": [],  # Posty które się nie podobały
+                "adjustments": [],  # Konkretne korekty (np. "krótsze", "mniej emoji")
+                "stats": {
+                    "total_positive": 0,
+                    "total_negative": 0,
+                    "total_adjustments": 0
+                }
             }
-        }
+        
+        # Limit ostatnich wpisów - deque odrzuca najstarszy w O(1)
+        for key in ("positive", "negative"):
+            data[key] = deque(data.get(key, []), maxlen=self.MAX_ENTRIES)
+        return data
     
     def _save(self):
         """Zapisuje feedback"""
-        with open(self.filepath, "w", encoding="utf-8") as f:
-            json.dump(self.feedback_data, f, ensure_ascii=False, indent=2)
+        self._learn_cache.clear()
+        if self._defer_save():
+            return
+        _write_data(self.filepath, _dumps(self.feedback_data))
     
     def add_positive(self, content: str, platform: str, metadata: Dict = None):
         """Zapisuje pozytywny feedback"""
         entry = {
-            "content_preview": content[:200] + "..." if len(content) > 200 else content,
+            "content_preview": _preview(content),
             "platform": platform,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _now_iso(),
             "metadata": metadata or {}
         }
         self.feedback_data["positive"].append(entry)
         self.feedback_data["stats"]["total_positive"] += 1
-        
-        # Limit do 50 ostatnich
-        self.feedback_data["positive"] = self.feedback_data["positive"][-50:]
         self._save()
         logger.info(f"Zapisano pozytywny feedback dla {platform}")
     
     def add_negative(self, content: str, platform: str, reason: str = None):
         """Zapisuje negatywny feedback"""
         entry = {
-            "content_preview": content[:200] + "..." if len(content) > 200 else content,
+            "content_preview": _preview(content),
             "platform": platform,
             "reason": reason,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _now_iso()
         }
         self.feedback_data["negative"].append(entry)
         self.feedback_data["stats"]["total_negative"] += 1
-        
-        # Limit do 50 ostatnich
-        self.feedback_data["negative"] = self.feedback_data["negative"][-50:]
         self._save()
         logger.info(f"Zapisano negatywny feedback dla {platform}")
     
@@ -237,7 +504,7 @@ class FeedbackManager:
         entry = {
             "type": adjustment_type,
             "details": details,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _now_iso()
         }
         self.feedback_data["adjustments"].append(entry)
         self.feedback_data["stats"]["total_adjustments"] += 1
@@ -247,36 +514,34 @@ class FeedbackManager:
         """
         Zwraca kontekst uczenia dla promptów.
         Agent wie co użytkownik lubi/nie lubi.
+        Wynik jest cache'owany per platforma do następnego feedbacku.
         """
-        positive = self.feedback_data["positive"]
-        negative = self.feedback_data["negative"]
-        adjustments = self.feedback_data["adjustments"]
+        cached = self._learn_cache.get(platform)
+        if cached is not None:
+            return cached
         
-        if platform:
-            positive = [p for p in positive if p["platform"] == platform]
-            negative = [n for n in negative if n["platform"] == platform]
+        positive = self._last_for_platform(self.feedback_data["positive"], platform, 3)
+        negative = self._last_for_platform(self.feedback_data["negative"], platform, 3)
+        adjustments = self.feedback_data["adjustments"]
         
         context_parts = []
         
         # Przykłady pozytywne (few-shot)
         if positive:
             context_parts.append("=== PRZYKŁADY DOBREGO STYLU ===")
-            for p in positive[-3:]:  # Ostatnie 3
+            for p in positive:  # Ostatnie 3
                 context_parts.append(f"✓ {p['content_preview']}")
         
         # Czego unikać
         if negative:
             context_parts.append("\n=== CZEGO UNIKAĆ ===")
-            for n in negative[-3:]:
+            for n in negative:
                 reason = f" (Powód: {n['reason']})" if n.get('reason') else ""
                 context_parts.append(f"✗ {n['content_preview']}{reason}")
         
         # Preferencje korekt
         if adjustments:
-            recent_adj = {}
-            for adj in adjustments[-10:]:
-                adj_type = adj["type"]
-                recent_adj[adj_type] = recent_adj.get(adj_type, 0) + 1
+            recent_adj = Counter(adj["type"] for adj in adjustments[-10:])
             
             if recent_adj:
                 context_parts.append("\n=== PREFERENCJE UŻYTKOWNIKA ===")
@@ -284,77 +549,405 @@ class FeedbackManager:
                     if count >= 2:  # Tylko jeśli powtórzone
                         context_parts.append(f"- Preferuje: {adj_type}")
         
-        return "\n".join(context_parts) if context_parts else ""
+        context = "\n".join(context_parts) if context_parts else ""
+        self._learn_cache[platform] = context
+        return context
+    
+    @staticmethod
+    def _last_for_platform(entries: Deque[Dict], platform: Optional[str], count: int) -> List[Dict]:
+        """Ostatnie `count` wpisów (opcjonalnie dla platformy), bez kopiowania całej listy"""
+        if platform:
+            matches = (e for e in reversed(entries) if e["platform"] == platform)
+        else:
+            matches = reversed(entries)
+        last = list(islice(matches, count))
+        last.reverse()
+        return last
     
     def get_stats(self) -> Dict[str, int]:
         """Zwraca statystyki feedbacku"""
         return self.feedback_data["stats"]
 
 
-class PostsHistory:
+class PostsHistory(BatchedWrites):
     """
     Historia wygenerowanych postów.
     Używana do unikania powtórzeń i analizy.
+    
+    Zapis w formacie JSON Lines - nowy post to jedno dopisanie linii,
+    plik jest kompaktowany dopiero gdy urośnie ponad COMPACT_AT linii.
     """
     
-    def __init__(self, filename: str = "posts_history.json"):
+    MAX_POSTS = 200
+    COMPACT_AT = 400
+    
+    def __init__(self, filename: str = "posts_history.jsonl"):
         self.filepath = DATA_DIR / filename
-        self.history = self._load()
+        self._file_lines = 0
+        self._lock = threading.Lock()
+        # Słowo tematu -> {id(post): post}; kolejność wstawiania = kolejność w historii
+        self._topic_index: Dict[str, Dict[int, Dict]] = defaultdict(dict)
+        # id(post) -> zakodowana linia JSONL; kompaktacja nie koduje postów ponownie
+        self._encoded: Dict[int, bytes] = {}
+    
+    @cached_property
+    def history(self) -> Deque[Dict[str, Any]]:
+        """Historia postów - plik wczytywany przy pierwszym dostępie"""
+        history = self._load()
+        for post in history:
+            self._index_post(post)
+        return history
+    
+    def _index_post(self, post: Dict[str, Any]):
+        for token in post.get("topic", "").lower().split():
+            self._topic_index[token][id(post)] = post
     
-    def _load(self) -> List[Dict[str, Any]]:
-        """Ładuje historię"""
+    def _unindex_post(self, post: Dict[str, Any]):
+        self._encoded.pop(id(post), None)
+        for token in post.get("topic", "").lower().split():
+            posts = self._topic_index.get(token)
+            if posts is not None:
+                posts.pop(id(post), None)
+                if not posts:
+                    del self._topic_index[token]
+    
+    def _load(self) -> Deque[Dict[str, Any]]:
+        """Ładuje historię (z migracją starego pliku .json)"""
         if self.filepath.exists():
+            # Okno ostatnich MAX_POSTS - starsze wpisy odpadają od razu
+            # przy parsowaniu, więc pamięć nie rośnie z rozmiarem pliku
+            window = deque(maxlen=self.MAX_POSTS)
+            line_count = 0
+            corrupted = False
+            for line in _iter_lines(self.filepath):
+                if not line.strip():
+                    continue
+                line_count += 1
+                try:
+                    # Surowa linia zostaje jako gotowy zapis posta
+                    window.append((_loads(line), line + b"\n"))
+                except json.JSONDecodeError:
+                    # Np. urwany ostatni zapis - pomijamy linię
+                    logger.warning("Pominięto uszkodzoną linię historii")
+                    corrupted = True
+            # Uszkodzony plik - wymuś kompaktację przy następnym zapisie
+            self._file_lines = self.COMPACT_AT if corrupted else line_count
+            self._encoded = {id(post): line for post, line in window}
+            return deque((post for post, _ in window), maxlen=self.MAX_POSTS)
+        
+        legacy_path = self.filepath.with_suffix(".json")
+        if self.filepath.suffix == ".jsonl" and legacy_path.exists():
             try:
-                with open(self.filepath, "r", encoding="utf-8") as f:
-                    return json.load(f)
+                history = deque(_loads(_read_file(legacy_path)), maxlen=self.MAX_POSTS)
+            except CompressedFileError as e:
+                # Stary plik zostaje nietknięty (bez kwarantanny)
+                logger.error(f"{e} - pomijam migrację historii")
+                return deque(maxlen=self.MAX_POSTS)
             except json.JSONDecodeError:
-                return []
-        return []
+                logger.warning("Błąd odczytu starej historii")
+                _quarantine(legacy_path)
+                return deque(maxlen=self.MAX_POSTS)
+            self.history = history
+            self._save()
+            logger.info(f"Zmigrowano historię do {self.filepath.name}")
+            return history
+        
+        return deque(maxlen=self.MAX_POSTS)
     
     def _save(self):
-        """Zapisuje historię"""
-        with open(self.filepath, "w", encoding="utf-8") as f:
-            json.dump(self.history, f, ensure_ascii=False, indent=2)
+        """Przepisuje (kompaktuje) cały plik historii"""
+        if self._defer_save():
+            return
+        _write_atomic(self.filepath, b"".join(self._encode(post) for post in self.history))
+        self._file_lines = len(self.history)
+    
+    def _encode(self, post: Dict[str, Any]) -> bytes:
+        """Linia JSONL posta - kodowana raz, potem brana z cache"""
+        line = self._encoded.get(id(post))
+        if line is None:
+            line = self._encoded[id(post)] = _dumps_line(post)
+        return line
+    
+    def _append(self, entry: Dict[str, Any]):
+        """Dopisuje jeden wpis na koniec pliku"""
+        line = self._encode(entry)
+        if self._batch_depth > 0 or self._file_lines >= self.COMPACT_AT:
+            self._save()
+            return
+        if self._file_lines == 0:
+            self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.filepath, "ab") as f:
+            f.write(line)
+        self._file_lines += 1
     
     def add_post(self, content: str, platform: str, topic: str, 
                  agent_logs: List[str] = None, score: float = None):
-        """Dodaje post do historii"""
+        """Dodaje post do historii (bezpieczne dla wielu wątków)"""
+        with self._lock:
+            entry = {
+                "id": len(self.history) + 1,
+                "content": content,
+                "platform": platform,
+                "topic": topic,
+                "agent_logs": agent_logs or [],
+                "score": score,
+                "created_at": _now_iso()
+            }
+            # Limit do 200 postów (w pamięci; plik kompaktowany okresowo) -
+            # deque sam odrzuci najstarszy, trzeba go tylko zdjąć z indeksu
+            if len(self.history) == self.MAX_POSTS:
+                self._unindex_post(self.history[0])
+            self.history.append(entry)
+            self._index_post(entry)
+            self._append(entry)
+        
+        return entry["id"]
+    
+    def get_recent(self, count: int = 10, platform: str = None) -> List[Dict]:
+        """Pobiera ostatnie posty"""
+        if platform:
+            posts = [p for p in self.history if p["platform"] == platform]
+            return posts[-count:]
+        if count <= 0:
+            # Ta sama semantyka wycinka [-count:] co wyżej (0 = cała historia)
+            return list(self.history)[-count:]
+        return list(islice(self.history, max(len(self.history) - count, 0), None))
+    
+    def get_by_topic(self, topic_keywords: List[str]) -> List[Dict]:
+        """
+        Znajduje posty po słowach kluczowych tematu.
+        Dopasowanie fragmentu tematu (jak `kw in topic`), ale przez indeks słów
+        zamiast skanowania każdego posta.
+        """
+        matched: Dict[int, Dict] = {}
+        
+        for kw in topic_keywords:
+            kw_lower = kw.lower()
+            words = kw_lower.split()
+            
+            if not words:
+                # Pusty / same spacje - brak słowa do indeksu, sprawdź wprost
+                for post in self.history:
+                    if kw_lower in post.get("topic", "").lower():
+                        matched[id(post)] = post
+                continue
+            
+            # Kandydaci: posty ze słowem zawierającym pierwsze słowo keywordu
+            needs_check = len(words) > 1 or words[0] != kw_lower
+            for token, posts in self._topic_index.items():
+                if words[0] not in token:
+                    continue
+                for key, post in posts.items():
+                    if key in matched:
+                        continue
+                    if needs_check and kw_lower not in post.get("topic", "").lower():
+                        continue
+                    matched[key] = post
+        
+        # Zachowaj kolejność chronologiczną
+        return [post for post in self.history if id(post) in matched]
+    
+    def count(self) -> int:
+        """Liczba postów w historii"""
+        return len(self.history)
+
+
+class SQLitePostsHistory(BatchedWrites):
+    """
+    Historia postów w bazie SQLite - to samo API co PostsHistory.
+    
+    Dodanie posta to jeden INSERT (plus usunięcie najstarszego wiersza
+    po przekroczeniu limitu), bez przepisywania pliku. Przy pierwszym
+    uruchomieniu importuje istniejącą historię z posts_history.jsonl.
+    """
+    
+    MAX_POSTS = 200
+    
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS posts(
+            id INTEGER PRIMARY KEY,
+            content TEXT,
+            platform TEXT,
+            topic TEXT,
+            agent_logs TEXT,
+            score REAL,
+            created_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_platform ON posts(platform);
+    """
+    _COLUMNS = "id, content, platform, topic, agent_logs, score, created_at"
+    
+    def __init__(self, filename: str = "posts_history.db"):
+        self.filepath = DATA_DIR / filename
+        self._lock = threading.Lock()
+    
+    @cached_property
+    def _conn(self) -> sqlite3.Connection:
+        """Połączenie z bazą - otwierane przy pierwszym dostępie"""
+        is_new = not self.filepath.exists()
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.filepath, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # lower() w SQLite obsługuje tylko ASCII - polskie znaki przez Pythona
+        conn.create_function("py_lower", 1, lambda s: s.lower() if s else "",
+                             deterministic=True)
+        conn.executescript(self._SCHEMA)
+        if is_new:
+            self._import_legacy(conn)
+        return conn
+    
+    def _import_legacy(self, conn: sqlite3.Connection):
+        """Przenosi historię z pliku JSON Lines (jeśli istnieje)"""
+        legacy_path = self.filepath.with_suffix(".jsonl")
+        if not (legacy_path.exists() or legacy_path.with_suffix(".json").exists()):
+            return
+        posts = PostsHistory(str(legacy_path)).history
+        conn.executemany(
+            "INSERT INTO posts(content, platform, topic, agent_logs, score, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [self._to_row(post) for post in posts]
+        )
+        conn.commit()
+        logger.info(f"Zaimportowano {len(posts)} postów do {self.filepath.name}")
+    
+    @staticmethod
+    def _to_row(post: Dict[str, Any]) -> tuple:
+        return (
+            post.get("content"),
+            post.get("platform"),
+            post.get("topic", ""),
+            json.dumps(post.get("agent_logs") or [], ensure_ascii=False),
+            post.get("score"),
+            post.get("created_at"),
+        )
+    
+    @staticmethod
+    def _from_row(row: tuple) -> Dict[str, Any]:
+        post_id, content, platform, topic, agent_logs, score, created_at = row
+        return {
+            "id": post_id,
+            "content": content,
+            "platform": platform,
+            "topic": topic,
+            "agent_logs": json.loads(agent_logs) if agent_logs else [],
+            "score": score,
+            "created_at": created_at,
+        }
+    
+    def _save(self):
+        """Zatwierdza transakcję (w batchu - raz na końcu)"""
+        if self._defer_save():
+            return
+        self._conn.commit()
+    
+    @property
+    def history(self) -> List[Dict[str, Any]]:
+        """Cała historia (od najstarszego) - zgodność z PostsHistory"""
+        return self.get_recent(self.MAX_POSTS)
+    
+    def add_post(self, content: str, platform: str, topic: str, 
+                 agent_logs: List[str] = None, score: float = None):
+        """Dodaje post do historii (bezpieczne dla wielu wątków)"""
         entry = {
-            "id": len(self.history) + 1,
             "content": content,
             "platform": platform,
             "topic": topic,
             "agent_logs": agent_logs or [],
             "score": score,
-            "created_at": datetime.now().isoformat()
+            "created_at": _now_iso()
         }
-        self.history.append(entry)
-        
-        # Limit do 200 postów
-        self.history = self.history[-200:]
-        self._save()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO posts(content, platform, topic, agent_logs, score, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                self._to_row(entry)
+            )
+            post_id = cursor.lastrowid
+            # Limit do 200 postów - zakres po kluczu głównym, bez skanowania
+            self._conn.execute("DELETE FROM posts WHERE id <= ?", (post_id - self.MAX_POSTS,))
+            self._save()
         
-        return entry["id"]
+        return post_id
     
     def get_recent(self, count: int = 10, platform: str = None) -> List[Dict]:
         """Pobiera ostatnie posty"""
-        posts = self.history
+        query = f"SELECT {self._COLUMNS} FROM posts"
+        params: list = []
         if platform:
-            posts = [p for p in posts if p["platform"] == platform]
-        return posts[-count:]
+            query += " WHERE platform = ?"
+            params.append(platform)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(max(count, 0))
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._from_row(row) for row in reversed(rows)]
     
     def get_by_topic(self, topic_keywords: List[str]) -> List[Dict]:
-        """Znajduje posty po słowach kluczowych tematu"""
-        results = []
-        for post in self.history:
-            topic_lower = post.get("topic", "").lower()
-            if any(kw.lower() in topic_lower for kw in topic_keywords):
-                results.append(post)
-        return results
+        """Znajduje posty po słowach kluczowych tematu (fragment, bez wielkości liter)"""
+        if not topic_keywords:
+            return []
+        condition = " OR ".join(
+            "instr(py_lower(topic), ?) > 0" for _ in topic_keywords
+        )
+        params = [kw.lower() for kw in topic_keywords]
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM posts WHERE {condition} ORDER BY id",
+                params
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
     
     def count(self) -> int:
         """Liczba postów w historii"""
-        return len(self.history)
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+    
+    def close(self):
+        """Zamyka połączenie z bazą"""
+        if "_conn" in self.__dict__:
+            self._conn.close()
+            del self.__dict__["_conn"]
+
+
+def create_posts_history() -> Union[PostsHistory, SQLitePostsHistory]:
+    """
+    Historia postów wg zmiennej POSTS_HISTORY_BACKEND:
+    "jsonl" (domyślnie) albo "sqlite" - posts_history.db, przy pierwszym
+    uruchomieniu z zaimportowaną historią z posts_history.jsonl.
+    """
+    backend = os.environ.get("POSTS_HISTORY_BACKEND", "jsonl").strip().lower()
+    if backend == "sqlite":
+        return SQLitePostsHistory()
+    if backend != "jsonl":
+        logger.warning(f"Nieznany POSTS_HISTORY_BACKEND={backend!r} - używam jsonl")
+    return PostsHistory()
+
+
+class MemorySystem:
+    """
+    Wspólny punkt dostępu do wszystkich magazynów pamięci agenta.
+    
+    `with memory.batch():` grupuje zapisy DNA, feedbacku i historii naraz -
+    każdy zmieniony plik zapisywany jest raz, przy wyjściu z bloku.
+    """
+    
+    def __init__(
+        self,
+        brand_memory: BrandMemory = None,
+        feedback_manager: FeedbackManager = None,
+        posts_history: PostsHistory = None
+    ):
+        self.brand_memory = brand_memory or BrandMemory()
+        self.feedback_manager = feedback_manager or FeedbackManager()
+        self.posts_history = posts_history or create_posts_history()
+    
+    @contextmanager
+    def batch(self):
+        """Jedna transakcja zapisu dla wszystkich magazynów"""
+        with self.brand_memory.batch(), self.feedback_manager.batch(), \
+                self.posts_history.batch():
+            yield self
 
 
 # === TESTY MODUŁU ===
@@ -7,16 +7,101 @@ Model Router - Inteligentny routing i fallback
 """
 
 import os
+import re
+import atexit
+import json
 import time
+import asyncio
+import hashlib
 import logging
-from typing import Optional, Dict, Any, List, Callable
-from dataclasses import dataclass, field
+import threading
+import weakref
+from collections import OrderedDict, deque
+from typing import Optional, Dict, Any, List, Callable, Tuple, Set
+from dataclasses import dataclass, field, replace
 from enum import Enum
 from abc import ABC, abstractmethod
 
+# SDK providerów są opcjonalne - brak pakietu = błąd providera przy wywołaniu
+try:
+    import groq
+except ImportError:
+    groq = None
+
+try:
+    import openai
+except ImportError:
+    openai = None
+
+try:
+    import httpx  # zależność obu SDK
+except ImportError:
+    httpx = None
+
+# Metryki Prometheus są opcjonalne - bez pakietu zostają tylko statystyki routera
+try:
+    from prometheus_client import REGISTRY, Counter, Histogram
+except ImportError:
+    Counter = Histogram = None
+
 logger = logging.getLogger(__name__)
 
 
+def _metric(metric_cls, name: str, *args, **kwargs):
+    """
+    Metryka w domyślnym rejestrze. Ponowny import modułu (reload, rerun Streamlit)
+    używa już zarejestrowanej zamiast zgłaszać "Duplicated timeseries".
+    """
+    try:
+        return metric_cls(name, *args, **kwargs)
+    except ValueError:
+        existing = REGISTRY._names_to_collectors.get(name)
+        if existing is None:
+            raise
+        return existing
+
+
+if Counter is not None:
+    LLM_CALLS = _metric(
+        Counter, "llm_calls_total", "Wywołania modeli LLM",
+        ["provider", "model", "success"]
+    )
+    LLM_LATENCY = _metric(
+        Histogram, "llm_latency_ms", "Czas odpowiedzi modeli LLM (ms)",
+        ["provider", "model"],
+        buckets=(100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+    )
+else:
+    LLM_CALLS = LLM_LATENCY = None
+
+# Pula połączeń HTTP klientów SDK (keep-alive między wywołaniami)
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE = 20
+HTTP_KEEPALIVE_EXPIRY = 30.0
+
+# Rozpoznawanie rate limitingu po treści błędu (gdy wyjątek nie jest typu SDK)
+_RATE_LIMIT_RE = re.compile(r"\b(rate[ _]limit|429|quota|too many requests)", re.IGNORECASE)
+
+
+def _http_limits():
+    """Limity puli połączeń keep-alive"""
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+    )
+
+
+def _create_http_client():
+    """Klient httpx z pulą połączeń keep-alive"""
+    return httpx.Client(limits=_http_limits())
+
+
+def _create_async_http_client():
+    """Asynchroniczny klient httpx z pulą połączeń keep-alive"""
+    return httpx.AsyncClient(limits=_http_limits())
+
+
 class TaskType(Enum):
     """Typy zadań wymagające różnych modeli"""
     STRATEGY = "strategy"          # Wymaga reasoning
@@ -34,20 +119,21 @@ class ProviderStatus(Enum):
     UNKNOWN = "unknown"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ModelConfig:
-    """Konfiguracja pojedynczego modelu"""
+    """Konfiguracja pojedynczego modelu (niezmienna, hashowalna)"""
     provider: str           # groq, openai, anthropic
     model_id: str           # np. llama-3.3-70b-versatile
     display_name: str       # Nazwa do wyświetlania
-    task_types: List[TaskType]  # Do jakich zadań
+    task_types: Tuple[TaskType, ...]  # Do jakich zadań
     temperature_default: float = 0.7
     max_tokens: int = 2048
     priority: int = 1       # Niższy = wyższy priorytet
     cost_per_1k: float = 0.0  # Koszt (dla budżetowania)
+    context_window: int = 8192  # Maks. tokenów prompt + odpowiedź
 
 
-@dataclass
+@dataclass(slots=True)
 class APIResponse:
     """Ustandaryzowana odpowiedź API"""
     success: bool
@@ -60,7 +146,7 @@ class APIResponse:
     raw_response: Any = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ProviderState:
     """Stan providera (do rate limiting)"""
     status: ProviderStatus = ProviderStatus.AVAILABLE
@@ -70,12 +156,192 @@ class ProviderState:
     cooldown_until: float = 0
 
 
+class TokenBucket:
+    """
+    Token bucket - limit zapytań na minutę.
+    Pojemność `capacity` pozwala na krótkie serie, potem zapytania
+    przechodzą w tempie `refill_rate` na sekundę.
+    """
+    
+    def __init__(self, capacity: int, refill_rate: float):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
+    
+    def available(self) -> float:
+        """Liczba dostępnych tokenów (bez pobierania)"""
+        with self._lock:
+            self._refill()
+            return self.tokens
+    
+    def try_acquire(self, n: int = 1) -> bool:
+        """Pobiera n tokenów jeśli są dostępne"""
+        with self._lock:
+            self._refill()
+            if self.tokens >= n:
+                self.tokens -= n
+                return True
+            return False
+    
+    def wait_time(self, n: int = 1) -> float:
+        """Czas (s) do uzbierania n tokenów - 0 gdy są dostępne"""
+        with self._lock:
+            self._refill()
+            return max(0.0, (n - self.tokens) / self.refill_rate)
+    
+    def drain(self) -> float:
+        """Opróżnia kubełek; zwraca czas (s) do odnowienia jednego tokenu"""
+        with self._lock:
+            self.tokens = 0.0
+            self.last_refill = time.monotonic()
+            return 1 / self.refill_rate
+
+
+class LLMCache:
+    """
+    Cache odpowiedzi dla deterministycznych wywołań (temperature == 0).
+    LRU z czasem życia wpisu; klucz = SHA-256 z (model, wiadomości, parametry).
+    """
+    
+    def __init__(self, max_size: int = 256, ttl_seconds: float = 3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, APIResponse]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(
+        model_id: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        payload = json.dumps(
+            {"model": model_id, "messages": messages,
+             "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[APIResponse]:
+        """Zwraca odpowiedź z cache (lub None jeśli brak / wygasła)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, key: str, response: APIResponse):
+        """Zapisuje udaną odpowiedź"""
+        with self._lock:
+            self._entries[key] = (time.time(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
 class BaseProvider(ABC):
     """Bazowa klasa dla providerów API"""
     
+    # Limit zapytań na minutę (token bucket)
+    REQUESTS_PER_MINUTE = 60
+    
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.state = ProviderState()
+        self.bucket = TokenBucket(
+            capacity=self.REQUESTS_PER_MINUTE,
+            refill_rate=self.REQUESTS_PER_MINUTE / 60
+        )
+        # Klienci async są związani z pętlą zdarzeń - jeden na pętlę
+        self._async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._client = None
+        self._client_lock = threading.Lock()
+    
+    @property
+    def client(self) -> Any:
+        """
+        Klient SDK - tworzony raz przy pierwszym wywołaniu.
+        Kolejne wywołania używają tych samych połączeń (bez nowego TCP/TLS).
+        Blokada: rozgrzewanie w tle i pierwsze zapytanie nie tworzą dwóch klientów.
+        """
+        client = self._client
+        if client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client()
+                client = self._client
+        return client
+    
+    @abstractmethod
+    def _create_client(self) -> Any:
+        """Tworzy klienta SDK providera"""
+        pass
+    
+    # Ustawiane przez _shared_provider przy zleceniu rozgrzewania
+    _warmed = False
+    
+    def warm(self):
+        """
+        Otwiera połączenie (TCP + TLS) z API zawczasu lekkim zapytaniem
+        o listę modeli - pierwsze prawdziwe wywołanie nie czeka na handshake.
+        """
+        try:
+            self.client.models.list()
+            logger.info(f"{self.name}: połączenie rozgrzane")
+        except Exception as e:
+            logger.debug(f"{self.name}: rozgrzewanie połączenia nieudane: {e}")
+    
+    def close(self):
+        """Zamyka klienta SDK (i jego połączenia), jeśli został utworzony"""
+        with self._client_lock:
+            client, self._client = self._client, None
+        if client is not None:
+            try:
+                client.close()
+            except Exception as e:
+                logger.debug(f"{self.name}: błąd zamykania klienta: {e}")
+    
+    @property
+    def async_client(self) -> Any:
+        """Asynchroniczny klient SDK dla bieżącej pętli zdarzeń"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = self._create_async_client()
+        return client
+    
+    @abstractmethod
+    def _create_async_client(self) -> Any:
+        """Tworzy asynchronicznego klienta SDK providera"""
+        pass
+    
+    async def aclose_async_client(self):
+        """Zamyka klienta async bieżącej pętli (przed jej zakończeniem, np. w asyncio.run)"""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            try:
+                await client.close()
+            except Exception as e:
+                logger.debug(f"{self.name}: błąd zamykania klienta async: {e}")
     
     @abstractmethod
     def call(
@@ -88,6 +354,66 @@ class BaseProvider(ABC):
         """Wykonaj wywołanie API"""
         pass
     
+    async def acall(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: int = 2048
+    ) -> APIResponse:
+        """
+        Asynchroniczne wywołanie API.
+        Domyślnie synchroniczne call() w wątku - providerzy z klientem
+        async nadpisują tę metodę.
+        """
+        return await asyncio.to_thread(self.call, messages, model, temperature, max_tokens)
+    
+    # Klasy wyjątków SDK oznaczające rate limiting
+    _rate_limit_errors: tuple = ()
+    
+    def _is_rate_limit(self, e: Exception, message: Optional[str] = None) -> bool:
+        """Czy wyjątek oznacza rate limiting (typ wyjątku, potem kod HTTP, potem treść)"""
+        if isinstance(e, self._rate_limit_errors):
+            return True
+        status_code = getattr(e, "status_code", None)
+        if status_code is not None:
+            return status_code == 429
+        return _RATE_LIMIT_RE.search(str(e) if message is None else message) is not None
+    
+    def _success_response(self, response: Any, model: str, start_time: float) -> APIResponse:
+        """Odpowiedź SDK (format chat.completions) -> APIResponse"""
+        latency = int((time.time() - start_time) * 1000)
+        self.state.requests_count += 1
+        
+        return APIResponse(
+            success=True,
+            content=response.choices[0].message.content,
+            model_used=model,
+            provider=self.name,
+            tokens_used=response.usage.total_tokens if response.usage else 0,
+            latency_ms=latency,
+            raw_response=response
+        )
+    
+    def _error_response(self, e: Exception, start_time: float) -> APIResponse:
+        """Oznacza stan providera po błędzie i zwraca APIResponse z błędem"""
+        # Czas i treść błędu liczone raz - przy kaskadzie fallbacków to gorąca ścieżka
+        latency = int((time.time() - start_time) * 1000)
+        message = str(e)
+        
+        # Rozpoznaj rate limiting
+        if self._is_rate_limit(e, message):
+            self.mark_rate_limited()
+        else:
+            self.mark_error(message, cooldown_seconds=30)
+        
+        return APIResponse(
+            success=False,
+            error=message,
+            provider=self.name,
+            latency_ms=latency
+        )
+    
     @property
     @abstractmethod
     def name(self) -> str:
@@ -95,35 +421,61 @@ class BaseProvider(ABC):
         pass
     
     def is_available(self) -> bool:
-        """Czy provider jest dostępny"""
-        if self.state.status == ProviderStatus.RATE_LIMITED:
-            if time.time() > self.state.cooldown_until:
-                self.state.status = ProviderStatus.AVAILABLE
+        """
+        Czy provider jest dostępny (błąd / cooldown po rate limitingu).
+        Wolne tokeny limitu sprawdza router przy wywołaniu - brak tokenu to czekanie, nie awaria.
+        """
+        # Wartości Enum są singletonami - `is` zamiast wolniejszego __eq__
+        state = self.state
+        if state.status is ProviderStatus.RATE_LIMITED:
+            if time.time() > state.cooldown_until:
+                state.status = ProviderStatus.AVAILABLE
                 return True
             return False
-        return self.state.status == ProviderStatus.AVAILABLE
+        return state.status is ProviderStatus.AVAILABLE
     
     def mark_error(self, error: str, cooldown_seconds: int = 60):
         """Oznacz błąd providera"""
         self.state.status = ProviderStatus.ERROR
         self.state.last_error = error
-        self.state.last_error_time = time.time()
-        self.state.cooldown_until = time.time() + cooldown_seconds
+        now = time.time()
+        self.state.last_error_time = now
+        self.state.cooldown_until = now + cooldown_seconds
     
-    def mark_rate_limited(self, cooldown_seconds: int = 60):
-        """Oznacz rate limiting"""
+    def mark_rate_limited(self, cooldown_seconds: Optional[float] = None):
+        """
+        Oznacz rate limiting (429).
+        Opróżnia token bucket - provider wraca, gdy odnowi się pierwszy
+        token, zamiast stać bezczynnie pełną minutę.
+        """
+        refill_seconds = self.bucket.drain()
+        if cooldown_seconds is None:
+            cooldown_seconds = refill_seconds
         self.state.status = ProviderStatus.RATE_LIMITED
         self.state.cooldown_until = time.time() + cooldown_seconds
-        logger.warning(f"{self.name}: Rate limited, cooldown {cooldown_seconds}s")
+        logger.warning(f"{self.name}: Rate limited, cooldown {cooldown_seconds:.1f}s")
 
 
 class GroqProvider(BaseProvider):
     """Provider dla Groq API"""
     
+    REQUESTS_PER_MINUTE = 30  # Darmowy plan Groq
+    _rate_limit_errors = (groq.RateLimitError,) if groq else ()
+    
     @property
     def name(self) -> str:
         return "groq"
     
+    def _create_client(self) -> Any:
+        if groq is None:
+            raise ImportError("Brak pakietu groq (pip install groq)")
+        return groq.Groq(api_key=self.api_key, http_client=_create_http_client())
+    
+    def _create_async_client(self) -> Any:
+        if groq is None:
+            raise ImportError("Brak pakietu groq (pip install groq)")
+        return groq.AsyncGroq(api_key=self.api_key, http_client=_create_async_http_client())
+    
     def call(
         self,
         messages: List[Dict[str, str]],
@@ -134,53 +486,59 @@ class GroqProvider(BaseProvider):
         start_time = time.time()
         
         try:
-            from groq import Groq
-            client = Groq(api_key=self.api_key)
-            
-            response = client.chat.completions.create(
+            response = self.client.chat.completions.create(
                 messages=messages,
                 model=model,
                 temperature=temperature,
                 max_tokens=max_tokens
             )
+            return self._success_response(response, model, start_time)
             
-            latency = int((time.time() - start_time) * 1000)
-            self.state.requests_count += 1
-            
-            return APIResponse(
-                success=True,
-                content=response.choices[0].message.content,
-                model_used=model,
-                provider=self.name,
-                tokens_used=response.usage.total_tokens if response.usage else 0,
-                latency_ms=latency,
-                raw_response=response
+        except Exception as e:
+            return self._error_response(e, start_time)
+    
+    async def acall(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: int = 2048
+    ) -> APIResponse:
+        start_time = time.time()
+        
+        try:
+            response = await self.async_client.chat.completions.create(
+                messages=messages,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens
             )
+            return self._success_response(response, model, start_time)
             
         except Exception as e:
-            error_str = str(e).lower()
-            
-            # Rozpoznaj rate limiting
-            if "rate" in error_str or "limit" in error_str or "429" in error_str:
-                self.mark_rate_limited(cooldown_seconds=60)
-            else:
-                self.mark_error(str(e), cooldown_seconds=30)
-            
-            return APIResponse(
-                success=False,
-                error=str(e),
-                provider=self.name,
-                latency_ms=int((time.time() - start_time) * 1000)
-            )
+            return self._error_response(e, start_time)
 
 
 class OpenAIProvider(BaseProvider):
     """Provider dla OpenAI API (fallback)"""
     
+    REQUESTS_PER_MINUTE = 500
+    _rate_limit_errors = (openai.RateLimitError,) if openai else ()
+    
     @property
     def name(self) -> str:
         return "openai"
     
+    def _create_client(self) -> Any:
+        if openai is None:
+            raise ImportError("Brak pakietu openai (pip install openai)")
+        return openai.OpenAI(api_key=self.api_key, http_client=_create_http_client())
+    
+    def _create_async_client(self) -> Any:
+        if openai is None:
+            raise ImportError("Brak pakietu openai (pip install openai)")
+        return openai.AsyncOpenAI(api_key=self.api_key, http_client=_create_async_http_client())
+    
     def call(
         self,
         messages: List[Dict[str, str]],
@@ -191,43 +549,74 @@ class OpenAIProvider(BaseProvider):
         start_time = time.time()
         
         try:
-            from openai import OpenAI
-            client = OpenAI(api_key=self.api_key)
-            
-            response = client.chat.completions.create(
+            response = self.client.chat.completions.create(
                 messages=messages,
                 model=model,
                 temperature=temperature,
                 max_tokens=max_tokens
             )
+            return self._success_response(response, model, start_time)
             
-            latency = int((time.time() - start_time) * 1000)
-            self.state.requests_count += 1
-            
-            return APIResponse(
-                success=True,
-                content=response.choices[0].message.content,
-                model_used=model,
-                provider=self.name,
-                tokens_used=response.usage.total_tokens if response.usage else 0,
-                latency_ms=latency,
-                raw_response=response
+        except Exception as e:
+            return self._error_response(e, start_time)
+    
+    async def acall(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: int = 2048
+    ) -> APIResponse:
+        start_time = time.time()
+        
+        try:
+            response = await self.async_client.chat.completions.create(
+                messages=messages,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens
             )
+            return self._success_response(response, model, start_time)
             
         except Exception as e:
-            error_str = str(e).lower()
-            
-            if "rate" in error_str or "limit" in error_str:
-                self.mark_rate_limited(cooldown_seconds=60)
-            else:
-                self.mark_error(str(e), cooldown_seconds=30)
-            
-            return APIResponse(
-                success=False,
-                error=str(e),
-                provider=self.name,
-                latency_ms=int((time.time() - start_time) * 1000)
-            )
+            return self._error_response(e, start_time)
+
+
+# === WSPÓŁDZIELENI PROVIDERZY ===
+
+# Jeden provider na (klasa, klucz API) w całym procesie - wszystkie routery
+# korzystają z tego samego klienta SDK, puli połączeń i limitu zapytań
+_PROVIDER_REGISTRY: Dict[Tuple[str, str], BaseProvider] = {}
+_PROVIDER_REGISTRY_LOCK = threading.Lock()
+
+
+def _shared_provider(provider_cls: type, api_key: str, warm: bool = False) -> BaseProvider:
+    """
+    Zwraca współdzielonego providera dla klucza API (tworzy przy pierwszym użyciu).
+    warm=True rozgrzewa połączenie w tle - raz na providera, nie przy każdym
+    nowym routerze (np. sesji Streamlit).
+    """
+    key = (provider_cls.__name__, api_key)
+    with _PROVIDER_REGISTRY_LOCK:
+        provider = _PROVIDER_REGISTRY.get(key)
+        if provider is None:
+            provider = _PROVIDER_REGISTRY[key] = provider_cls(api_key)
+        if warm and not provider._warmed:
+            provider._warmed = True
+            threading.Thread(
+                target=provider.warm,
+                name=f"warm-{provider_cls.__name__}",
+                daemon=True
+            ).start()
+        return provider
+
+
+@atexit.register
+def _close_shared_providers():
+    """Zamyka połączenia providerów przy wyjściu z procesu"""
+    with _PROVIDER_REGISTRY_LOCK:
+        for provider in _PROVIDER_REGISTRY.values():
+            provider.close()
 
 
 class ModelRouter:
@@ -243,28 +632,31 @@ class ModelRouter:
             provider="groq",
             model_id="llama-3.3-70b-versatile",
             display_name="Llama 3.3 70B",
-            task_types=[TaskType.STRATEGY, TaskType.CREATIVE_WRITING, TaskType.CRITIQUE],
+            task_types=(TaskType.STRATEGY, TaskType.CREATIVE_WRITING, TaskType.CRITIQUE),
             temperature_default=0.7,
             priority=1,
-            cost_per_1k=0.0
+            cost_per_1k=0.0,
+            context_window=131072
         ),
         ModelConfig(
             provider="groq",
             model_id="llama-3.1-8b-instant",
             display_name="Llama 3.1 8B (Fast)",
-            task_types=[TaskType.EDITING, TaskType.QUICK_TASK],
+            task_types=(TaskType.EDITING, TaskType.QUICK_TASK),
             temperature_default=0.5,
             priority=1,
-            cost_per_1k=0.0
+            cost_per_1k=0.0,
+            context_window=131072
         ),
         ModelConfig(
             provider="groq",
             model_id="mixtral-8x7b-32768",
             display_name="Mixtral 8x7B",
-            task_types=[TaskType.STRATEGY, TaskType.CREATIVE_WRITING],
+            task_types=(TaskType.STRATEGY, TaskType.CREATIVE_WRITING),
             temperature_default=0.7,
             priority=2,
-            cost_per_1k=0.0
+            cost_per_1k=0.0,
+            context_window=32768
         ),
         
         # OpenAI - Fallback
@@ -272,67 +664,96 @@ class ModelRouter:
             provider="openai",
             model_id="gpt-4o-mini",
             display_name="GPT-4o Mini",
-            task_types=[TaskType.STRATEGY, TaskType.CREATIVE_WRITING, TaskType.CRITIQUE, TaskType.EDITING],
+            task_types=(TaskType.STRATEGY, TaskType.CREATIVE_WRITING, TaskType.CRITIQUE, TaskType.EDITING),
             temperature_default=0.7,
             priority=10,  # Niższy priorytet (fallback)
-            cost_per_1k=0.15
+            cost_per_1k=0.15,
+            context_window=128000
         ),
         ModelConfig(
             provider="openai",
             model_id="gpt-3.5-turbo",
             display_name="GPT-3.5 Turbo",
-            task_types=[TaskType.EDITING, TaskType.QUICK_TASK],
+            task_types=(TaskType.EDITING, TaskType.QUICK_TASK),
             temperature_default=0.5,
             priority=11,
-            cost_per_1k=0.05
+            cost_per_1k=0.05,
+            context_window=16385
         ),
     ]
     
-    def __init__(self):
+    # Przybliżenie znaków na token (bez tokenizera). Celowo zaniżamy liczbę
+    # tokenów - odrzucamy tylko zapytania, które na pewno się nie zmieszczą.
+    CHARS_PER_TOKEN = 4
+    
+    # Ile ostatnich wywołań trzymać w call_history (statystyki są liczone od startu)
+    CALL_HISTORY_SIZE = 1000
+    
+    # Zadania, dla których (przy race_requests=True) acall odpytuje providerów równolegle
+    RACE_TASK_TYPES = frozenset({TaskType.QUICK_TASK})
+    
+    # Maks. czas czekania na token limitu zapytań, gdy wszyscy kandydaci go wyczerpali
+    RATE_LIMIT_WAIT_SECONDS = 60.0
+    
+    def __init__(self, warm_connections: bool = True, race_requests: bool = False):
         self.providers: Dict[str, BaseProvider] = {}
+        # Rozgrzanie połączeń w tle - nie blokuje startu aplikacji
+        self.warm_connections = warm_connections
+        # Wyścig providerów skraca opóźnienie kosztem ~2x tokenów - domyślnie wyłączony
+        self.race_requests = race_requests
         self.models: List[ModelConfig] = self.DEFAULT_MODELS.copy()
-        self.call_history: List[Dict] = []
+        self.call_history: deque = deque(maxlen=self.CALL_HISTORY_SIZE)
+        # Statystyki aktualizowane przy każdym wywołaniu - get_stats bez skanowania historii
+        self._stats_lock = threading.Lock()
+        self._total_calls = 0
+        self._successful_calls = 0
+        self._provider_stats: Dict[str, Dict[str, int]] = {}
+        self.cache = LLMCache()
+        self._index_models()
         self._initialize_providers()
     
+    def _index_models(self):
+        """
+        Indeksuje modele po typie zadania (posortowane po priorytecie).
+        Wywołaj ponownie po zmianie self.models.
+        """
+        self._models_sorted = sorted(self.models, key=lambda m: m.priority)
+        self._models_by_task: Dict[TaskType, List[ModelConfig]] = {
+            task: [m for m in self._models_sorted if task in m.task_types]
+            for task in TaskType
+        }
+    
     def _initialize_providers(self):
         """Inicjalizuje dostępnych providerów"""
         
         # Groq
         groq_key = os.environ.get("GROQ_API_KEY")
         if groq_key:
-            self.providers["groq"] = GroqProvider(groq_key)
+            self.providers["groq"] = _shared_provider(GroqProvider, groq_key, self.warm_connections)
             logger.info("✓ Groq provider initialized")
         
         # OpenAI (opcjonalny fallback)
         openai_key = os.environ.get("OPENAI_API_KEY")
         if openai_key:
-            self.providers["openai"] = OpenAIProvider(openai_key)
+            self.providers["openai"] = _shared_provider(OpenAIProvider, openai_key, self.warm_connections)
             logger.info("✓ OpenAI provider initialized (fallback)")
         
         if not self.providers:
             logger.error("❌ No API providers available!")
     
     def get_available_models(self, task_type: TaskType = None) -> List[ModelConfig]:
-        """Zwraca dostępne modele dla danego typu zadania"""
-        available = []
-        
-        for model in self.models:
-            # Sprawdź czy provider jest dostępny
-            provider = self.providers.get(model.provider)
-            if not provider or not provider.is_available():
-                continue
-            
-            # Filtruj po typie zadania
-            if task_type and task_type not in model.task_types:
-                continue
-            
-            available.append(model)
+        """Zwraca dostępne modele dla danego typu zadania (wg priorytetu)"""
+        models = self._models_by_task[task_type] if task_type else self._models_sorted
+        providers = self.providers
         
-        # Sortuj po priorytecie
-        return sorted(available, key=lambda m: m.priority)
+        # Listy są już posortowane - zostaje tylko filtr dostępności providera
+        return [
+            model for model in models
+            if (provider := providers.get(model.provider)) and provider.is_available()
+        ]
     
-    def select_model(self, task_type: TaskType) -> Optional[ModelConfig]:
-        """Wybiera najlepszy model do zadania"""
+    def _candidate_models(self, task_type: TaskType) -> List[ModelConfig]:
+        """Dostępne modele dla zadania, a gdy brak - jakiekolwiek dostępne"""
         available = self.get_available_models(task_type)
         
         if not available:
@@ -340,6 +761,12 @@ class ModelRouter:
             # Fallback - weź cokolwiek
             available = self.get_available_models()
         
+        return available
+    
+    def select_model(self, task_type: TaskType) -> Optional[ModelConfig]:
+        """Wybiera najlepszy model do zadania"""
+        available = self._candidate_models(task_type)
+        
         if available:
             selected = available[0]
             logger.info(f"Selected model: {selected.display_name} for {task_type.value}")
@@ -366,117 +793,429 @@ class ModelRouter:
             max_retries: Liczba prób przed poddaniem się
         """
         
+        # Zapytania, które nie wymagają (lub nie przetrwają) wywołania API
+        direct = self._try_direct(messages, task_type, max_tokens)
+        if direct:
+            return direct
+        
         attempts = 0
         last_error = ""
-        tried_models = set()
         
-        while attempts < max_retries:
-            # Wybierz model
-            model_config = self.select_model(task_type)
+        # Kandydaci wyznaczani raz - kolejne próby idą w dół listy
+        candidates = self._candidate_models(task_type)
+        if not candidates:
+            return APIResponse(
+                success=False,
+                error="No available models"
+            )
+        
+        deadline = time.monotonic() + self.RATE_LIMIT_WAIT_SECONDS
+        while candidates and attempts < max_retries:
+            # Modele pominięte z braku tokenu limitu - wrócimy do nich po odnowieniu
+            limited: List[ModelConfig] = []
             
-            if not model_config:
-                return APIResponse(
-                    success=False,
-                    error="No available models"
+            for model_config in candidates:
+                if attempts >= max_retries:
+                    break
+                
+                # Stan providera mógł się zmienić po wcześniejszej próbie
+                provider = self.providers.get(model_config.provider)
+                if not provider or (attempts and not provider.is_available()):
+                    continue
+                
+                # Ustaw temperaturę
+                temp = temperature if temperature is not None else model_config.temperature_default
+                
+                # Deterministyczne wywołanie - odpowiedź może być w cache
+                cache_key, cached = self._cache_lookup(model_config, messages, temp, max_tokens)
+                if cached:
+                    return cached
+                
+                # Limit zapytań providera - bez tokenu próbuj innego modelu
+                if not provider.bucket.try_acquire():
+                    last_error = f"{provider.name}: request limit reached"
+                    limited.append(model_config)
+                    continue
+                
+                logger.info(f"Attempting: {model_config.display_name} (attempt {attempts + 1})")
+                
+                # Wykonaj wywołanie
+                response = provider.call(
+                    messages=messages,
+                    model=model_config.model_id,
+                    temperature=temp,
+                    max_tokens=max_tokens
                 )
-            
-            # Unikaj powtarzania tego samego modelu
-            model_key = f"{model_config.provider}:{model_config.model_id}"
-            if model_key in tried_models:
-                # Szukaj alternatywy
-                available = self.get_available_models(task_type)
-                alternative = None
-                for m in available:
-                    key = f"{m.provider}:{m.model_id}"
-                    if key not in tried_models:
-                        alternative = m
-                        break
+                self._record_call(model_config, response)
                 
-                if alternative:
-                    model_config = alternative
-                    model_key = f"{model_config.provider}:{model_config.model_id}"
-                else:
-                    # Brak alternatyw
-                    break
+                if response.success:
+                    if cache_key:
+                        self.cache.set(cache_key, response)
+                    return response
+                
+                last_error = response.error
+                logger.warning(f"Failed: {model_config.display_name} - {response.error}")
+                attempts += 1
             
-            tried_models.add(model_key)
+            # Wszyscy pozostali kandydaci bez tokenu - czekaj na najbliższe odnowienie
+            delay = self._limit_delay(limited, deadline)
+            if delay is None:
+                break
+            time.sleep(delay)
+            candidates = limited
+        
+        return APIResponse(
+            success=False,
+            error=f"All attempts failed. Last error: {last_error}"
+        )
+    
+    async def acall(
+        self,
+        messages: List[Dict[str, str]],
+        task_type: TaskType = TaskType.CREATIVE_WRITING,
+        temperature: Optional[float] = None,
+        max_tokens: int = 2048,
+        max_retries: int = 3
+    ) -> APIResponse:
+        """
+        Asynchroniczna wersja call() - ten sam wybór modelu i fallback.
+        Wiele wywołań może czekać na odpowiedź równolegle:
+        `await asyncio.gather(router.acall(...), router.acall(...))`
+        """
+        # Zapytania, które nie wymagają (lub nie przetrwają) wywołania API
+        direct = self._try_direct(messages, task_type, max_tokens)
+        if direct:
+            return direct
+        
+        tried: Set[ModelConfig] = set()
+        last_error = ""
+        if self.race_requests and task_type in self.RACE_TASK_TYPES:
+            raced = await self._race(messages, task_type, temperature, max_tokens, tried=tried)
+            if raced is not None and raced.success:
+                return raced
+            if raced is not None:
+                # Wszyscy uczestnicy wyścigu zawiedli - dalej pozostałe modele
+                last_error = raced.error
+        
+        return await self._acall_fallback(
+            messages, task_type, temperature, max_tokens, max_retries,
+            tried=tried, last_error=last_error
+        )
+    
+    async def _acall_fallback(
+        self,
+        messages: List[Dict[str, str]],
+        task_type: TaskType,
+        temperature: Optional[float],
+        max_tokens: int,
+        max_retries: int,
+        tried: Set[ModelConfig] = frozenset(),
+        last_error: str = ""
+    ) -> APIResponse:
+        """
+        Kolejne modele kandydujące - fallback jak w call().
+        Modele z `tried` (np. z przegranego wyścigu) są pomijane i liczą się jako próby.
+        """
+        attempts = len(tried)
+        
+        candidates = self._candidate_models(task_type)
+        if not candidates:
+            return APIResponse(
+                success=False,
+                error="No available models"
+            )
+        
+        candidates = [m for m in candidates if m not in tried]
+        deadline = time.monotonic() + self.RATE_LIMIT_WAIT_SECONDS
+        while candidates and attempts < max_retries:
+            limited: List[ModelConfig] = []
             
-            # Pobierz providera
-            provider = self.providers.get(model_config.provider)
-            if not provider:
+            for model_config in candidates:
+                if attempts >= max_retries:
+                    break
+                
+                provider = self.providers.get(model_config.provider)
+                if not provider or (attempts and not provider.is_available()):
+                    continue
+                
+                temp = temperature if temperature is not None else model_config.temperature_default
+                
+                cache_key, cached = self._cache_lookup(model_config, messages, temp, max_tokens)
+                if cached:
+                    return cached
+                
+                # Limit zapytań providera - bez tokenu próbuj innego modelu
+                if not provider.bucket.try_acquire():
+                    last_error = f"{provider.name}: request limit reached"
+                    limited.append(model_config)
+                    continue
+                
+                logger.info(f"Attempting: {model_config.display_name} (attempt {attempts + 1})")
+                
+                response = await provider.acall(
+                    messages=messages,
+                    model=model_config.model_id,
+                    temperature=temp,
+                    max_tokens=max_tokens
+                )
+                self._record_call(model_config, response)
+                
+                if response.success:
+                    if cache_key:
+                        self.cache.set(cache_key, response)
+                    return response
+                
+                last_error = response.error
+                logger.warning(f"Failed: {model_config.display_name} - {response.error}")
                 attempts += 1
+            
+            delay = self._limit_delay(limited, deadline)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+            candidates = limited
+        
+        return APIResponse(
+            success=False,
+            error=f"All attempts failed. Last error: {last_error}"
+        )
+    
+    async def _race(
+        self,
+        messages: List[Dict[str, str]],
+        task_type: TaskType,
+        temperature: Optional[float],
+        max_tokens: int,
+        providers: int = 2,
+        tried: Optional[Set[ModelConfig]] = None
+    ) -> Optional[APIResponse]:
+        """
+        Wyścig najlepszych modeli różnych providerów. None = nikogo nie wystartowano.
+        Wystartowane modele są dopisywane do `tried`.
+        """
+        # Najlepszy model każdego providera (kandydaci są już posortowani)
+        planned = []
+        seen = set()
+        for model_config in self._candidate_models(task_type):
+            if len(planned) >= providers:
+                break
+            if model_config.provider in seen:
                 continue
+            seen.add(model_config.provider)
             
-            # Ustaw temperaturę
             temp = temperature if temperature is not None else model_config.temperature_default
-            
-            logger.info(f"Attempting: {model_config.display_name} (attempt {attempts + 1})")
-            
-            # Wykonaj wywołanie
-            response = provider.call(
+            cache_key, cached = self._cache_lookup(model_config, messages, temp, max_tokens)
+            if cached:
+                return cached
+            planned.append((model_config, temp, cache_key))
+        
+        racers: Dict[asyncio.Task, Tuple[ModelConfig, Optional[str]]] = {}
+        for model_config, temp, cache_key in planned:
+            provider = self.providers[model_config.provider]
+            if not provider.bucket.try_acquire():
+                continue
+            task = asyncio.create_task(provider.acall(
                 messages=messages,
                 model=model_config.model_id,
                 temperature=temp,
                 max_tokens=max_tokens
-            )
-            
-            # Zapisz do historii
-            self.call_history.append({
-                "model": model_config.model_id,
-                "provider": model_config.provider,
-                "success": response.success,
-                "latency_ms": response.latency_ms,
-                "tokens": response.tokens_used,
-                "timestamp": time.time()
-            })
-            
-            if response.success:
-                return response
-            
-            last_error = response.error
-            logger.warning(f"Failed: {model_config.display_name} - {response.error}")
-            attempts += 1
-            
-            # Krótka pauza przed retry
-            time.sleep(0.5)
+            ))
+            racers[task] = (model_config, cache_key)
+            if tried is not None:
+                tried.add(model_config)
+        
+        if not racers:
+            return None
+        
+        logger.info(f"Racing: {', '.join(m.display_name for m, _ in racers.values())}")
+        
+        pending = set(racers)
+        last_error = ""
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    model_config, cache_key = racers[task]
+                    response = task.result()
+                    self._record_call(model_config, response)
+                    
+                    if response.success:
+                        if cache_key:
+                            self.cache.set(cache_key, response)
+                        return response
+                    
+                    last_error = response.error
+                    logger.warning(f"Failed: {model_config.display_name} - {response.error}")
+        finally:
+            # Przegrani są anulowani (wywołania w wątkach dokończą się w tle)
+            for task in pending:
+                task.cancel()
         
         return APIResponse(
             success=False,
-            error=f"All attempts failed. Last error: {last_error}"
+            error=f"All racing providers failed. Last error: {last_error}"
         )
     
+    async def acall_batch(
+        self,
+        batches: List[List[Dict[str, str]]],
+        task_type: TaskType = TaskType.CREATIVE_WRITING,
+        temperature: Optional[float] = None,
+        max_tokens: int = 2048,
+        max_concurrency: int = 10
+    ) -> List[APIResponse]:
+        """
+        Wiele niezależnych zapytań naraz (maks. `max_concurrency` w locie).
+        Każde zapytanie ma własny fallback jak w acall().
+        Wyniki w kolejności `batches`.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def bounded(messages: List[Dict[str, str]]) -> APIResponse:
+            async with semaphore:
+                return await self.acall(messages, task_type, temperature, max_tokens)
+        
+        return await asyncio.gather(*(bounded(messages) for messages in batches))
+    
+    def call_batch(
+        self,
+        batches: List[List[Dict[str, str]]],
+        task_type: TaskType = TaskType.CREATIVE_WRITING,
+        temperature: Optional[float] = None,
+        max_tokens: int = 2048,
+        max_concurrency: int = 10
+    ) -> List[APIResponse]:
+        """
+        Synchroniczna wersja acall_batch (dla kodu bez pętli zdarzeń).
+        Każde wywołanie to nowa pętla - jej klienci async są zamykani na końcu.
+        """
+        async def run_batch() -> List[APIResponse]:
+            try:
+                return await self.acall_batch(batches, task_type, temperature, max_tokens, max_concurrency)
+            finally:
+                for provider in self.providers.values():
+                    await provider.aclose_async_client()
+        
+        return asyncio.run(run_batch())
+    
+    def _try_direct(
+        self,
+        messages: List[Dict[str, str]],
+        task_type: TaskType,
+        max_tokens: int
+    ) -> Optional[APIResponse]:
+        """
+        Odpowiedź bez sieci dla zapytań skazanych na błąd:
+        pusty prompt lub prompt większy niż kontekst każdego modelu.
+        None = zapytanie idzie do providera.
+        """
+        if not any(
+            m.get("role") == "user" and (m.get("content") or "").strip()
+            for m in messages
+        ):
+            return APIResponse(success=False, error="Empty prompt")
+        
+        models = self._models_by_task[task_type] if task_type else self._models_sorted
+        context_limit = max((m.context_window for m in models), default=0)
+        prompt_chars = sum(len(m.get("content") or "") for m in messages)
+        estimated_tokens = prompt_chars // self.CHARS_PER_TOKEN + max_tokens
+        if context_limit and estimated_tokens > context_limit:
+            return APIResponse(
+                success=False,
+                error=f"Prompt too long: ~{estimated_tokens} tokens, limit {context_limit}"
+            )
+        
+        return None
+    
+    def _limit_delay(self, limited: List[ModelConfig], deadline: float) -> Optional[float]:
+        """
+        Czas do najbliższego tokenu wśród providerów pominiętych z braku limitu.
+        None = nie ma na kogo czekać albo minął termin (deadline z time.monotonic).
+        """
+        if not limited:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        wait = min(self.providers[m.provider].bucket.wait_time() for m in limited)
+        return min(wait, remaining)
+    
+    def _cache_lookup(
+        self,
+        model_config: ModelConfig,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int
+    ) -> Tuple[Optional[str], Optional[APIResponse]]:
+        """
+        (klucz, trafienie) dla wywołań z temperature == 0.
+        Przy wyższej temperaturze odpowiedzi mają się różnić - bez cache.
+        """
+        if temperature != 0:
+            return None, None
+        key = LLMCache.make_key(model_config.model_id, messages, temperature, max_tokens)
+        cached = self.cache.get(key)
+        if cached:
+            logger.info(f"Cache hit: {model_config.display_name}")
+            return key, replace(cached, latency_ms=0)
+        return key, None
+    
+    def _record_call(self, model_config: ModelConfig, response: APIResponse):
+        """Zapisuje wywołanie do historii i statystyk"""
+        self.call_history.append({
+            "model": model_config.model_id,
+            "provider": model_config.provider,
+            "success": response.success,
+            "latency_ms": response.latency_ms,
+            "tokens": response.tokens_used,
+            "timestamp": time.time()
+        })
+        
+        if LLM_CALLS is not None:
+            LLM_CALLS.labels(
+                model_config.provider, model_config.model_id, str(response.success)
+            ).inc()
+            LLM_LATENCY.labels(
+                model_config.provider, model_config.model_id
+            ).observe(response.latency_ms)
+        
+        with self._stats_lock:
+            self._total_calls += 1
+            stats = self._provider_stats.get(model_config.provider)
+            if stats is None:
+                stats = self._provider_stats[model_config.provider] = {
+                    "calls": 0, "success": 0, "total_latency": 0
+                }
+            stats["calls"] += 1
+            stats["total_latency"] += response.latency_ms
+            if response.success:
+                self._successful_calls += 1
+                stats["success"] += 1
+    
     def call_simple(
         self,
         system_prompt: str,
         user_prompt: str,
         task_type: TaskType = TaskType.CREATIVE_WRITING,
-        temperature: float = None
+        temperature: float = None,
+        max_tokens: int = 2048
     ) -> APIResponse:
         """Uproszczone wywołanie z dwoma promptami"""
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ]
-        return self.call(messages, task_type, temperature)
+        return self.call(messages, task_type, temperature, max_tokens)
     
     def get_stats(self) -> Dict[str, Any]:
         """Zwraca statystyki wywołań"""
-        if not self.call_history:
-            return {"total_calls": 0}
+        with self._stats_lock:
+            total = self._total_calls
+            successful = self._successful_calls
+            provider_stats = {prov: dict(s) for prov, s in self._provider_stats.items()}
         
-        total = len(self.call_history)
-        successful = sum(1 for c in self.call_history if c["success"])
-        
-        # Statystyki per provider
-        provider_stats = {}
-        for call in self.call_history:
-            prov = call["provider"]
-            if prov not in provider_stats:
-                provider_stats[prov] = {"calls": 0, "success": 0, "total_latency": 0}
-            provider_stats[prov]["calls"] += 1
-            if call["success"]:
-                provider_stats[prov]["success"] += 1
-            provider_stats[prov]["total_latency"] += call["latency_ms"]
+        if not total:
+            return {"total_calls": 0}
         
         # Oblicz średnie
         for prov in provider_stats:
@@ -492,9 +1231,18 @@ class ModelRouter:
             "total_calls": total,
             "successful_calls": successful,
             "success_rate": successful / total if total > 0 else 0,
-            "providers": provider_stats
+            "providers": provider_stats,
+            "cache_hits": self.cache.hits
         }
     
+    def requests_per_minute(self) -> int:
+        """Limit zapytań na minutę głównego providera (pierwszego wg priorytetu); 0 = brak"""
+        for model_config in self._models_sorted:
+            provider = self.providers.get(model_config.provider)
+            if provider:
+                return provider.REQUESTS_PER_MINUTE
+        return 0
+    
     def get_provider_status(self) -> Dict[str, Dict]:
         """Zwraca status wszystkich providerów"""
         status = {}
@@ -514,14 +1262,31 @@ class ModelRouter:
             logger.info(f"Provider {provider_name} reset")
 
 
+@dataclass(slots=True)
+class ModelPerformance:
+    """Wyniki modelu w jednym typie zadania (SmartRouter)"""
+    total_calls: int = 0
+    total_latency: int = 0
+    success_count: int = 0
+    
+    @property
+    def score(self) -> float:
+        """Score: niższy = lepszy (ważona kombinacja)"""
+        avg_latency = self.total_latency / self.total_calls
+        success_rate = self.success_count / self.total_calls
+        return avg_latency * (2 - success_rate)
+
+
 class SmartRouter(ModelRouter):
     """
     Rozszerzony router z inteligentnymi funkcjami.
     """
     
-    def __init__(self):
-        super().__init__()
-        self.task_performance: Dict[TaskType, Dict[str, float]] = {}
+    def __init__(self, warm_connections: bool = True, race_requests: bool = False):
+        super().__init__(warm_connections, race_requests)
+        self.task_performance: Dict[TaskType, Dict[str, ModelPerformance]] = {}
+        # Najlepszy model per zadanie: (score, model_key) - aktualizowany przy każdym wyniku
+        self._best_by_task: Dict[TaskType, Tuple[float, str]] = {}
     
     def call_with_learning(
         self,
@@ -539,44 +1304,55 @@ class SmartRouter(ModelRouter):
             # Zapisz performance
             model_key = f"{response.provider}:{response.model_used}"
             
-            if task_type not in self.task_performance:
-                self.task_performance[task_type] = {}
-            
-            if model_key not in self.task_performance[task_type]:
-                self.task_performance[task_type][model_key] = {
-                    "total_calls": 0,
-                    "total_latency": 0,
-                    "success_count": 0
-                }
+            task_perf = self.task_performance.setdefault(task_type, {})
+            perf = task_perf.get(model_key)
+            if perf is None:
+                perf = task_perf[model_key] = ModelPerformance()
             
-            perf = self.task_performance[task_type][model_key]
-            perf["total_calls"] += 1
-            perf["total_latency"] += response.latency_ms
-            perf["success_count"] += 1
+            perf.total_calls += 1
+            perf.total_latency += response.latency_ms
+            perf.success_count += 1
+            self._update_best(task_type, model_key, perf)
         
         return response
     
+    def _update_best(self, task_type: TaskType, model_key: str, perf: ModelPerformance):
+        """Aktualizuje najlepszy model po zmianie wyników jednego modelu"""
+        score = perf.score
+        best = self._best_by_task.get(task_type)
+        
+        if best is None or score < best[0]:
+            self._best_by_task[task_type] = (score, model_key)
+        elif best[1] == model_key:
+            # Dotychczasowy lider się pogorszył - tylko wtedy pełne przeliczenie
+            self._best_by_task[task_type] = min(
+                (p.score, key)
+                for key, p in self.task_performance[task_type].items()
+                if p.total_calls > 0
+            )
+    
     def get_best_model_for_task(self, task_type: TaskType) -> Optional[str]:
         """Zwraca najlepszy model na podstawie historii"""
-        if task_type not in self.task_performance:
-            return None
-        
-        best_model = None
-        best_score = float('inf')
+        best = self._best_by_task.get(task_type)
+        return best[1] if best else None
+    
+    def _candidate_models(self, task_type: TaskType) -> List[ModelConfig]:
+        """
+        Kandydaci jak w ModelRouter, a w obrębie jednego priorytetu - wg wyników z historii.
+        Historia zna tylko sukcesy, więc fallback (który odpowiadał, gdy główny
+        provider zawiódł) nie może wyprzedzić modeli o wyższym priorytecie.
+        """
+        candidates = super()._candidate_models(task_type)
+        task_perf = self.task_performance.get(task_type)
+        if not task_perf:
+            return candidates
         
-        for model_key, perf in self.task_performance[task_type].items():
-            if perf["total_calls"] > 0:
-                avg_latency = perf["total_latency"] / perf["total_calls"]
-                success_rate = perf["success_count"] / perf["total_calls"]
-                
-                # Score: niższy = lepszy (ważona kombinacja)
-                score = avg_latency * (2 - success_rate)
-                
-                if score < best_score:
-                    best_score = score
-                    best_model = model_key
+        def rank(model: ModelConfig) -> Tuple[int, float]:
+            perf = task_perf.get(f"{model.provider}:{model.model_id}")
+            # Modele bez historii zostają w kolejności domyślnej, za sprawdzonymi
+            return model.priority, perf.score if perf else float("inf")
         
-        return best_model
+        return sorted(candidates, key=rank)
 
 
 # === HELPER FUNCTIONS ===
@@ -6,14 +6,47 @@ Prompt Builder - Modułowy system budowania promptów
 - Kontekst z pamięci
 """
 
+import re
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable, Set, Tuple
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
+from itertools import product
+
+# Automat Aho-Corasick jest opcjonalny - bez pakietu wyszukiwanie przez regex
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 logger = logging.getLogger(__name__)
 
 
+def _phrase_matcher(phrases: Tuple[str, ...]) -> Callable[[str], Set[str]]:
+    """
+    Zwraca funkcję znajdującą (w jednym przejściu po tekście) wszystkie
+    frazy występujące w tekście. Frazy i tekst muszą być małymi literami.
+    """
+    if not phrases:
+        return lambda text: set()
+    
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for phrase in phrases:
+            automaton.add_word(phrase, phrase)
+        automaton.make_automaton()
+        return lambda text: {phrase for _, phrase in automaton.iter(text)}
+    
+    # Najdłuższe najpierw - alternatywa regexa wybiera pierwszą pasującą.
+    # Lookahead, żeby frazy nakładające się też zostały znalezione.
+    alternatives = "|".join(
+        re.escape(phrase) for phrase in sorted(phrases, key=len, reverse=True)
+    )
+    pattern = re.compile(f"(?=({alternatives}))")
+    return lambda text: set(pattern.findall(text))
+
+
 class Platform(Enum):
     """Wspierane platformy"""
     LINKEDIN = "LinkedIn"
@@ -21,6 +54,11 @@ class Platform(Enum):
     FACEBOOK = "Facebook"
     INSTAGRAM = "Instagram"
     THREADS = "Threads"
+    
+    # Członkowie enuma są singletonami (równość = tożsamość), więc hash po
+    # tożsamości jest poprawny i liczony w C - Enum.__hash__ to funkcja Pythona.
+    # Enumy są kluczami słowników komponentów i cache promptów.
+    __hash__ = object.__hash__
 
 
 class ContentGoal(Enum):
@@ -31,6 +69,8 @@ class ContentGoal(Enum):
     CONVERSION = "conversion"  # Kliknięcia, zapisy
     EDUCATION = "education"    # Wartość edukacyjna
     STORYTELLING = "storytelling"  # Opowieść
+    
+    __hash__ = object.__hash__  # jak w Platform
 
 
 class ContentStyle(Enum):
@@ -41,15 +81,17 @@ class ContentStyle(Enum):
     INSPIRATIONAL = "inspirational"
     ANALYTICAL = "analytical"
     HUMOROUS = "humorous"
+    
+    __hash__ = object.__hash__  # jak w Platform
 
 
-@dataclass
+@dataclass(slots=True)
 class PromptContext:
     """Kontekst do budowania prompta"""
     topic: str
     platform: Platform
     goal: ContentGoal = ContentGoal.ENGAGEMENT
-    style: ContentStyle = ContentStyle.PROFESSIONAL
+    style: Optional[ContentStyle] = ContentStyle.PROFESSIONAL  # None = bez sekcji STYL
     brand_context: str = ""
     learning_context: str = ""
     additional_instructions: str = ""
@@ -390,99 +432,15 @@ Przed zwróceniem treści sprawdź:
 □ Brand - Czy to brzmi jak TA marka?
 □ Human - Czy to brzmi jak człowiek?
 """
-
-
-class PromptBuilder:
-    """
-    Główna klasa do budowania promptów.
-    Łączy komponenty w pełne, kontekstowe prompty.
-    """
     
-    def __init__(self):
-        self.components = PromptComponents()
-    
-    def build_system_prompt(
-        self,
-        agent_role: str,
-        context: PromptContext
-    ) -> str:
-        """
-        Buduje system prompt dla danego agenta.
-        
-        Args:
-            agent_role: Rola agenta (strategist, copywriter, editor, critic, brand_guardian)
-            context: Kontekst z informacjami o zadaniu
-        """
-        parts = []
-        
-        # 1. Rola agenta
-        role_prompt = self.components.AGENT_ROLES.get(agent_role, "")
-        if role_prompt:
-            parts.append(role_prompt)
-        
-        # 2. Zasady platformy
-        platform_rules = self.components.PLATFORM_RULES.get(context.platform, "")
-        if platform_rules:
-            parts.append(platform_rules)
-        
-        # 3. Cel treści
-        goal_instructions = self.components.GOAL_INSTRUCTIONS.get(context.goal, "")
-        if goal_instructions:
-            parts.append(goal_instructions)
-        
-        # 4. Styl treści
-        style_modifier = self.components.STYLE_MODIFIERS.get(context.style, "")
-        if style_modifier:
-            parts.append(style_modifier)
-        
-        # 5. Kontekst marki (z Brand DNA)
-        if context.brand_context:
-            parts.append(context.brand_context)
-        
-        # 6. Kontekst uczenia (z Feedback)
-        if context.learning_context:
-            parts.append(context.learning_context)
-        
-        # 7. Anti-generic filter (zawsze dla copywritera i editora)
-        if agent_role in ["copywriter", "editor"]:
-            parts.append(self.components.ANTI_GENERIC_FILTER)
-        
-        # 8. Quality checklist (dla copywritera)
-        if agent_role == "copywriter":
-            parts.append(self.components.QUALITY_CHECKLIST)
-        
-        # 9. Dodatkowe instrukcje
-        if context.additional_instructions:
-            parts.append(f"\n=== DODATKOWE INSTRUKCJE ===\n{context.additional_instructions}")
-        
-        # 10. Limit długości
-        if context.max_length:
-            parts.append(f"\n⚠️ MAX DŁUGOŚĆ: {context.max_length} znaków")
-        
-        return "\n\n".join(parts)
+    # === SZABLONY USER PROMPTÓW ===
     
-    def build_user_prompt(
-        self,
-        agent_role: str,
-        context: PromptContext,
-        previous_output: str = None,
-        critique: str = None
-    ) -> str:
-        """
-        Buduje user prompt (zadanie dla agenta).
-        
-        Args:
-            agent_role: Rola agenta
-            context: Kontekst
-            previous_output: Wynik poprzedniego kroku (dla editora/critic)
-            critique: Krytyka do poprawy (dla editora)
-        """
-        
-        if agent_role == "strategist":
-            return f"""
-TEMAT: {context.topic}
-PLATFORMA: {context.platform.value}
-CEL: {context.goal.value}
+    # Pola: {topic}, {platform}, {goal}, {previous_output}, {strategy}, {critique}
+    USER_TEMPLATES = {
+        "strategist": """
+TEMAT: {topic}
+PLATFORMA: {platform}
+CEL: {goal}
 
 Opracuj strategię podejścia w 2-3 zdaniach.
 Określ:
@@ -491,27 +449,23 @@ Określ:
 3. KEY MESSAGE (główny przekaz)
 
 Zwróć TYLKO strategię, nie pisz posta.
-"""
-        
-        elif agent_role == "copywriter":
-            return f"""
-TEMAT: {context.topic}
-PLATFORMA: {context.platform.value}
+""",
+        "copywriter": """
+TEMAT: {topic}
+PLATFORMA: {platform}
 
-{f"STRATEGIA DO REALIZACJI: {previous_output}" if previous_output else ""}
+{strategy}
 
 Napisz post realizujący powyższą strategię.
 Pamiętaj o wszystkich zasadach z system prompta.
 
 Zwróć TYLKO treść posta, bez komentarzy.
-"""
-        
-        elif agent_role == "editor":
-            return f"""
+""",
+        "editor": """
 ORYGINALNY TEKST:
 {previous_output}
 
-{f"UWAGI KRYTYKA: {critique}" if critique else ""}
+{critique}
 
 Popraw tekst:
 1. Skróć jeśli za długi
@@ -520,15 +474,13 @@ Popraw tekst:
 4. Usuń "AI-smród"
 
 Zwróć TYLKO poprawioną treść, bez komentarzy.
-"""
-        
-        elif agent_role == "critic":
-            return f"""
+""",
+        "critic": """
 TEKST DO OCENY:
 {previous_output}
 
-PLATFORMA: {context.platform.value}
-CEL: {context.goal.value}
+PLATFORMA: {platform}
+CEL: {goal}
 
 Oceń tekst krytycznie:
 1. SCORE: X/10
@@ -538,10 +490,8 @@ Oceń tekst krytycznie:
 5. SUGESTIE POPRAWY: (konkretne)
 
 Bądź bezlitosny ale konstruktywny.
-"""
-        
-        elif agent_role == "brand_guardian":
-            return f"""
+""",
+        "brand_guardian": """
 TEKST DO SPRAWDZENIA:
 {previous_output}
 
@@ -555,9 +505,288 @@ Zwróć:
 - ZGODNY: tak/nie
 - PROBLEMY: (lista jeśli są)
 - SUGESTIE: (jak naprawić)
-"""
+""",
+    }
+    
+    DEFAULT_USER_TEMPLATE = "TEMAT: {topic}"
+    
+    # (rola, platforma, cel) -> szablon z już wstawioną platformą i celem
+    _USER_TEMPLATE_BY_CONTEXT: Dict[tuple, str] = {}
+    
+    # === PREKOMPILACJA ===
+    
+    # Stałe części doklejane po kontekście marki/uczenia, per rola
+    ROLE_SUFFIXES = {
+        "copywriter": ANTI_GENERIC_FILTER + "\n\n" + QUALITY_CHECKLIST,
+        "editor": ANTI_GENERIC_FILTER,
+    }
+    
+    # (rola, platforma, cel, styl) -> złączone stałe części system prompta
+    _PREBUILT_PREFIX: Dict[tuple, str] = {}
+    
+    # Frazy zakazane w ANTI_GENERIC_FILTER (małe litery) i matcher do ich wyszukiwania
+    ANTI_GENERIC_PHRASES: Tuple[str, ...] = ()
+    _anti_generic_matcher: Callable[[str], Set[str]] = staticmethod(lambda text: set())
+    
+    # Opisy stylów bez otaczających pustych linii (sekcje WARIANT w prompcie wariantów)
+    _STYLE_BRIEFS: Dict[ContentStyle, str] = {}
+    
+    @classmethod
+    def static_prefix(
+        cls,
+        agent_role: str,
+        platform: Platform,
+        goal: ContentGoal,
+        style: ContentStyle
+    ) -> str:
+        """Rola, zasady platformy, cel i styl złączone jak w system prompcie"""
+        parts = (
+            cls.AGENT_ROLES.get(agent_role, ""),
+            cls.PLATFORM_RULES.get(platform, ""),
+            cls.GOAL_INSTRUCTIONS.get(goal, ""),
+            cls.STYLE_MODIFIERS.get(style, ""),
+        )
+        return "\n\n".join(part for part in parts if part)
+    
+    @classmethod
+    def precompile(cls, prefixes: bool = True):
+        """
+        Przygotowuje pochodne komponentów. Wywołaj ponownie po zmianie słowników.
         
-        return f"TEMAT: {context.topic}"
+        Args:
+            prefixes: Złóż z góry prefiksy dla wszystkich kombinacji ról i enumów
+                      (~900 KB). Bez tego prefiksy składane są przy pierwszym użyciu.
+        """
+        cls._PREBUILT_PREFIX = {
+            key: cls.static_prefix(*key)
+            for key in product(cls.AGENT_ROLES, Platform, ContentGoal, ContentStyle)
+        } if prefixes else {}
+        cls._USER_TEMPLATE_BY_CONTEXT = {}
+        cls._STYLE_BRIEFS = {
+            style: cls.STYLE_MODIFIERS.get(style, "").strip()
+            for style in ContentStyle
+        }
+        cls.ANTI_GENERIC_PHRASES = cls._parse_banned_phrases(cls.ANTI_GENERIC_FILTER)
+        cls._anti_generic_matcher = staticmethod(_phrase_matcher(cls.ANTI_GENERIC_PHRASES))
+    
+    @classmethod
+    def user_template(cls, agent_role: str, platform: Platform, goal: ContentGoal) -> str:
+        """Szablon user prompta roli z wstawioną platformą i celem (składany raz)"""
+        key = (agent_role, platform, goal)
+        template = cls._USER_TEMPLATE_BY_CONTEXT.get(key)
+        if template is None:
+            template = cls.USER_TEMPLATES.get(agent_role, cls.DEFAULT_USER_TEMPLATE)
+            template = template.replace("{platform}", platform.value).replace("{goal}", goal.value)
+            if agent_role in cls.USER_TEMPLATES:
+                cls._USER_TEMPLATE_BY_CONTEXT[key] = template
+        return template
+    
+    @staticmethod
+    def _parse_banned_phrases(filter_text: str) -> Tuple[str, ...]:
+        """
+        Wyciąga cytowane frazy z linii "❌" filtra (opisy bez cudzysłowu pomija).
+        "A/B wszystkim" daje dwie frazy: "a wszystkim" i "b wszystkim".
+        """
+        phrases = []
+        for line in filter_text.splitlines():
+            match = re.match(r'❌\s*"(.+)"\s*$', line.strip())
+            if not match:
+                continue
+            phrase = match.group(1).rstrip(".").strip().lower()
+            head, _, tail = phrase.partition(" ")
+            for variant in head.split("/"):
+                variant = f"{variant} {tail}".strip()
+                if variant not in phrases:
+                    phrases.append(variant)
+        return tuple(phrases)
+
+
+# Prefiksy składane leniwie - proces trzyma tylko kombinacje, których używa
+PromptComponents.precompile(prefixes=False)
+
+
+class PromptBuilder:
+    """
+    Główna klasa do budowania promptów.
+    Łączy komponenty w pełne, kontekstowe prompty.
+    """
+    
+    # Komponenty są stałymi klasy - bez kopii per instancja buildera
+    components = PromptComponents
+    
+    # Dłuższe teksty swobodne (temat, marka, instrukcje) nie trafiają do cache -
+    # każdy byłby osobnym, dużym wpisem. Cache mają też stały maxsize.
+    CACHEABLE_TEXT_LIMIT = 4096
+    
+    def build_system_prompt(
+        self,
+        agent_role: str,
+        context: PromptContext
+    ) -> str:
+        """
+        Buduje system prompt dla danego agenta.
+        
+        Args:
+            agent_role: Rola agenta (strategist, copywriter, editor, critic, brand_guardian)
+            context: Kontekst z informacjami o zadaniu
+        """
+        args = (
+            agent_role,
+            context.platform,
+            context.goal,
+            context.style,
+            context.brand_context,
+            context.learning_context,
+            context.additional_instructions,
+            context.max_length
+        )
+        if self._is_cacheable(context.brand_context, context.learning_context, context.additional_instructions):
+            return self._build_system_prompt_cached(*args)
+        # Długi tekst swobodny - bez cache (statyczny prefiks i tak jest współdzielony)
+        return self._build_system_prompt_cached.__wrapped__(*args)
+    
+    @classmethod
+    def _is_cacheable(cls, *texts: Optional[str]) -> bool:
+        """Czy teksty swobodne są na tyle krótkie, by trzymać wynik w cache"""
+        return sum(len(text) for text in texts if text) <= cls.CACHEABLE_TEXT_LIMIT
+    
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _build_system_prompt_cached(
+        agent_role: str,
+        platform: Platform,
+        goal: ContentGoal,
+        style: ContentStyle,
+        brand_context: str,
+        learning_context: str,
+        additional_instructions: str,
+        max_length: Optional[int]
+    ) -> str:
+        """
+        Składa system prompt. Zapamiętywane - te same wejścia powtarzają się
+        przy generowaniu wielu postów dla jednej marki.
+        """
+        # 1-4. Rola, platforma, cel i styl - prefiks złożony raz na kombinację
+        prefix_key = (agent_role, platform, goal, style)
+        prefix = PromptComponents._PREBUILT_PREFIX.get(prefix_key)
+        if prefix is None:
+            prefix = PromptComponents.static_prefix(agent_role, platform, goal, style)
+            if agent_role in PromptComponents.AGENT_ROLES:
+                PromptComponents._PREBUILT_PREFIX[prefix_key] = prefix
+        
+        # 7-8. Anti-generic filter (copywriter, editor) i quality checklist (copywriter)
+        role_suffix = PromptComponents.ROLE_SUFFIXES.get(agent_role)
+        
+        # Bez części dynamicznych wynik to prefiks (+ sufiks roli) - bez listy i join
+        if not (brand_context or learning_context or additional_instructions or max_length):
+            if role_suffix and prefix:
+                return prefix + "\n\n" + role_suffix
+            return role_suffix or prefix
+        
+        # 9. Dodatkowe instrukcje
+        extra = f"\n=== DODATKOWE INSTRUKCJE ===\n{additional_instructions}" if additional_instructions else ""
+        
+        # 10. Limit długości
+        length_limit = f"\n⚠️ MAX DŁUGOŚĆ: {max_length} znaków" if max_length else ""
+        
+        # Kolejność: prefiks, marka (Brand DNA), uczenie (Feedback),
+        # anti-generic/checklist, dodatkowe instrukcje, limit długości
+        return "\n\n".join([
+            part for part in (
+                prefix, brand_context, learning_context, role_suffix, extra, length_limit
+            ) if part
+        ])
+    
+    def build_user_prompt(
+        self,
+        agent_role: str,
+        context: PromptContext,
+        previous_output: str = None,
+        critique: str = None
+    ) -> str:
+        """
+        Buduje user prompt (zadanie dla agenta).
+        
+        Args:
+            agent_role: Rola agenta
+            context: Kontekst
+            previous_output: Wynik poprzedniego kroku (dla editora/critic)
+            critique: Krytyka do poprawy (dla editora)
+        """
+        if previous_output is None and critique is None and self._is_cacheable(context.topic):
+            return self._build_user_prompt_cached(
+                agent_role, context.topic, context.platform, context.goal
+            )
+        return self._render_user_prompt(
+            agent_role, context.topic, context.platform, context.goal,
+            previous_output, critique
+        )
+    
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _build_user_prompt_cached(
+        agent_role: str,
+        topic: str,
+        platform: Platform,
+        goal: ContentGoal
+    ) -> str:
+        """User prompt bez wyniku poprzedniego kroku - zapamiętywany"""
+        return PromptBuilder._render_user_prompt(agent_role, topic, platform, goal, None, None)
+    
+    @staticmethod
+    def _render_user_prompt(
+        agent_role: str,
+        topic: str,
+        platform: Platform,
+        goal: ContentGoal,
+        previous_output: Optional[str],
+        critique: Optional[str]
+    ) -> str:
+        """Składa user prompt dla roli agenta"""
+        template = PromptComponents.user_template(agent_role, platform, goal)
+        return template.format(
+            topic=topic,
+            previous_output=previous_output,
+            strategy=f"STRATEGIA DO REALIZACJI: {previous_output}" if previous_output else "",
+            critique=f"UWAGI KRYTYKA: {critique}" if critique else ""
+        )
+
+    def build_variations_prompt(
+        self,
+        context: PromptContext,
+        styles: List[ContentStyle]
+    ) -> str:
+        """
+        Buduje user prompt generujący kilka wariantów posta w jednym wywołaniu.
+        Model zwraca JSON: {"variants": ["...", "..."]} w kolejności stylów.
+        """
+        style_sections = []
+        for i, style in enumerate(styles, 1):
+            modifier = PromptComponents._STYLE_BRIEFS[style]
+            style_sections.append(f"WARIANT {i}:\n{modifier}")
+
+        styles_text = "\n\n".join(style_sections)
+
+        return f"""
+TEMAT: {context.topic}
+PLATFORMA: {context.platform.value}
+
+Napisz {len(styles)} różne warianty posta na ten temat.
+Każdy wariant pisz w INNYM stylu, opisanym poniżej:
+
+{styles_text}
+
+Zwróć TYLKO poprawny JSON, bez komentarzy i bez bloków kodu:
+{{"variants": ["treść wariantu 1", "treść wariantu 2", ...]}}
+Lista musi mieć dokładnie {len(styles)} elementy, w kolejności wariantów.
+"""
+    
+    def check_antigeneric(self, text: str) -> List[str]:
+        """Zwraca frazy z ANTI_GENERIC_FILTER występujące w tekście (kolejność z filtra)"""
+        found = PromptComponents._anti_generic_matcher(text.lower())
+        if not found:
+            return []
+        return [phrase for phrase in PromptComponents.ANTI_GENERIC_PHRASES if phrase in found]
     
     def build_quick_prompt(
         self,
@@ -570,6 +799,28 @@ Zwróć:
         Szybki builder dla prostych przypadków.
         Zwraca (system_prompt, user_prompt).
         """
+        if self._is_cacheable(topic, brand_context):
+            return self._build_quick_prompt_cached(topic, platform, brand_context, style)
+        return self._build_quick_prompt(topic, platform, brand_context, style)
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _build_quick_prompt_cached(
+        topic: str,
+        platform: Platform,
+        brand_context: str,
+        style: ContentStyle
+    ) -> tuple[str, str]:
+        """Zapamiętywana wersja - te same wejścia wracają np. przy odświeżaniu UI"""
+        return PromptBuilder()._build_quick_prompt(topic, platform, brand_context, style)
+    
+    def _build_quick_prompt(
+        self,
+        topic: str,
+        platform: Platform,
+        brand_context: str,
+        style: ContentStyle
+    ) -> tuple[str, str]:
         context = PromptContext(
             topic=topic,
             platform=platform,
@@ -588,35 +839,22 @@ Zwróć:
 class PromptPresets:
     """Gotowe presety dla typowych przypadków"""
     
+    # Stałe części presetów: (platforma, cel, styl) - zmienia się tylko temat i marka
+    VIRAL_LINKEDIN = (Platform.LINKEDIN, ContentGoal.VIRAL, ContentStyle.CONTROVERSIAL)
+    EDUCATIONAL_THREAD = (Platform.TWITTER, ContentGoal.EDUCATION, ContentStyle.ANALYTICAL)
+    STORY_FACEBOOK = (Platform.FACEBOOK, ContentGoal.STORYTELLING, ContentStyle.CASUAL)
+    
     @staticmethod
     def viral_linkedin(topic: str, brand_context: str = "") -> PromptContext:
-        return PromptContext(
-            topic=topic,
-            platform=Platform.LINKEDIN,
-            goal=ContentGoal.VIRAL,
-            style=ContentStyle.CONTROVERSIAL,
-            brand_context=brand_context
-        )
+        return PromptContext(topic, *PromptPresets.VIRAL_LINKEDIN, brand_context=brand_context)
     
     @staticmethod
     def educational_thread(topic: str, brand_context: str = "") -> PromptContext:
-        return PromptContext(
-            topic=topic,
-            platform=Platform.TWITTER,
-            goal=ContentGoal.EDUCATION,
-            style=ContentStyle.ANALYTICAL,
-            brand_context=brand_context
-        )
+        return PromptContext(topic, *PromptPresets.EDUCATIONAL_THREAD, brand_context=brand_context)
     
     @staticmethod
     def story_facebook(topic: str, brand_context: str = "") -> PromptContext:
-        return PromptContext(
-            topic=topic,
-            platform=Platform.FACEBOOK,
-            goal=ContentGoal.STORYTELLING,
-            style=ContentStyle.CASUAL,
-            brand_context=brand_context
-        )
+        return PromptContext(topic, *PromptPresets.STORY_FACEBOOK, brand_context=brand_context)
     
     @staticmethod
     def authority_post(topic: str, platform: Platform, brand_context: str = "") -> PromptContext:
@@ -8,23 +8,40 @@ Użycie:
     python generator.py "Temat" --platform linkedin --style professional
     python generator.py "Temat" --all-platforms --quick
     python generator.py "Temat" --output markdown
+    python generator.py --batch tematy.txt --all-platforms
 """
 
 import os
+import re
 import sys
+import time
+import asyncio
+import hashlib
+import statistics
 import argparse
 import logging
 from datetime import datetime
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
 
-# Import modułów core
-from core.memory_system import BrandMemory, FeedbackManager, PostsHistory
+try:
+    import orjson
+except ImportError:  # orjson jest opcjonalny - fallback na stdlib json
+    orjson = None
+
+# Import modułów core - enumy potrzebne są już dla argparse, router, pamięć
+# i silnik ładowane dopiero przy generowaniu (szybkie --help i błędy argumentów)
 from core.prompt_builder import Platform, ContentGoal, ContentStyle
-from core.model_router import ModelRouter
-from core.agent_engine import AgentEngine, AgentResult
+
+if TYPE_CHECKING:
+    from core.memory_system import MemorySystem
+    from core.model_router import ModelRouter
+    from core.agent_engine import AgentEngine, AgentResult
 
 # Konfiguracja
 load_dotenv()
@@ -46,9 +63,8 @@ class Colors:
     BOLD = '\033[1m'
 
 
-def print_header():
-    """Wyświetla header aplikacji"""
-    print(f"""
+# Banery składane raz przy imporcie
+HEADER = f"""
 {Colors.CYAN}{Colors.BOLD}
     ╔═══════════════════════════════════════════════════════════╗
     ║                                                           ║
@@ -58,7 +74,15 @@ def print_header():
     ║                                                           ║
     ╚═══════════════════════════════════════════════════════════╝
 {Colors.END}
-""")
+"""
+SEPARATOR = f"{Colors.BOLD}{'='*60}{Colors.END}"
+SUBSEPARATOR = f"{Colors.CYAN}{'─'*40}{Colors.END}"
+RESULTS_BANNER = f"\n{SEPARATOR}\n{Colors.BOLD}📄 WYGENEROWANE TREŚCI{Colors.END}\n{SEPARATOR}\n"
+
+
+def print_header():
+    """Wyświetla header aplikacji"""
+    print(HEADER)
 
 
 def print_step(emoji: str, message: str, color: str = Colors.CYAN):
@@ -76,19 +100,29 @@ def print_error(message: str):
     print(f"{Colors.RED}❌ {message}{Colors.END}")
 
 
+# Kolor logu wg emoji statusu - kolejność = priorytet (pierwsze trafienie wygrywa)
+LOG_COLORS = {
+    "✅": Colors.GREEN,
+    "🎉": Colors.GREEN,
+    "⚠️": Colors.YELLOW,
+    "🧐": Colors.YELLOW,
+    "❌": Colors.RED,
+}
+
+
+def log_color(log: str) -> str:
+    """Kolor terminala dla linii logu agenta"""
+    return next((color for emoji, color in LOG_COLORS.items() if emoji in log), Colors.CYAN)
+
+
+def format_log(log: str) -> str:
+    """Pokolorowana, wcięta linia logu agenta"""
+    return f"   {log_color(log)}{log}{Colors.END}"
+
+
 def print_log(log: str):
     """Wyświetla log agenta"""
-    # Kolorowanie na podstawie emoji
-    if "✅" in log or "🎉" in log:
-        color = Colors.GREEN
-    elif "⚠️" in log or "🧐" in log:
-        color = Colors.YELLOW
-    elif "❌" in log:
-        color = Colors.RED
-    else:
-        color = Colors.CYAN
-    
-    print(f"   {color}{log}{Colors.END}")
+    print(format_log(log))
 
 
 def validate_api_key() -> bool:
@@ -102,102 +136,144 @@ def validate_api_key() -> bool:
     return True
 
 
+# Nazwy z linii poleceń -> enumy (budowane raz; klucze służą też jako `choices`)
+PLATFORMS_BY_NAME = {platform.name.lower(): platform for platform in Platform}
+GOALS_BY_NAME = {goal.value: goal for goal in ContentGoal}
+STYLES_BY_NAME = {style.value: style for style in ContentStyle}
+
+
 def parse_platform(platform_str: str) -> Platform:
     """Parsuje string do Platform enum"""
-    mapping = {
-        "linkedin": Platform.LINKEDIN,
-        "twitter": Platform.TWITTER,
-        "facebook": Platform.FACEBOOK,
-        "instagram": Platform.INSTAGRAM,
-        "threads": Platform.THREADS
-    }
-    return mapping.get(platform_str.lower(), Platform.LINKEDIN)
+    return PLATFORMS_BY_NAME.get(platform_str.lower(), Platform.LINKEDIN)
 
 
 def parse_goal(goal_str: str) -> ContentGoal:
     """Parsuje string do ContentGoal enum"""
-    mapping = {
-        "engagement": ContentGoal.ENGAGEMENT,
-        "authority": ContentGoal.AUTHORITY,
-        "viral": ContentGoal.VIRAL,
-        "conversion": ContentGoal.CONVERSION,
-        "education": ContentGoal.EDUCATION,
-        "storytelling": ContentGoal.STORYTELLING
-    }
-    return mapping.get(goal_str.lower(), ContentGoal.ENGAGEMENT)
+    return GOALS_BY_NAME.get(goal_str.lower(), ContentGoal.ENGAGEMENT)
 
 
 def parse_style(style_str: str) -> ContentStyle:
     """Parsuje string do ContentStyle enum"""
-    mapping = {
-        "professional": ContentStyle.PROFESSIONAL,
-        "casual": ContentStyle.CASUAL,
-        "controversial": ContentStyle.CONTROVERSIAL,
-        "inspirational": ContentStyle.INSPIRATIONAL,
-        "analytical": ContentStyle.ANALYTICAL,
-        "humorous": ContentStyle.HUMOROUS
-    }
-    return mapping.get(style_str.lower(), ContentStyle.PROFESSIONAL)
+    return STYLES_BY_NAME.get(style_str.lower(), ContentStyle.PROFESSIONAL)
+
+
+# Znaki spoza liter/cyfr (Unicode) w nazwie pliku zamieniane są na "_"
+_UNSAFE_FILENAME_CHARS = re.compile(r"\W")
+
+
+def _make_filepath(topic: str, suffix: str, output_dir: Path, now: datetime) -> Path:
+    """Ścieżka pliku kampanii: campaign_<czas>_<temat (30 znaków)><suffix>"""
+    timestamp = now.strftime("%Y%m%d_%H%M%S")
+    safe_topic = _UNSAFE_FILENAME_CHARS.sub("_", topic[:30])
+    return output_dir / f"campaign_{timestamp}_{safe_topic}{suffix}"
+
+
+# openat(2) - zapis względem otwartego katalogu (Linux/macOS, nie Windows)
+SUPPORTS_DIR_FD = hasattr(os, "O_DIRECTORY") and os.open in os.supports_dir_fd
+
+
+def open_output_dir(output_dir: Path) -> Optional[int]:
+    """Deskryptor katalogu wyjściowego albo None, gdy system go nie wspiera"""
+    if not SUPPORTS_DIR_FD:
+        return None
+    return os.open(output_dir, os.O_RDONLY | os.O_DIRECTORY)
+
+
+def _write_file(filepath: Path, payload: bytes, dir_fd: Optional[int] = None):
+    """Zapisuje bajty jednym write - z `dir_fd` bez ponownego rozwiązywania ścieżki"""
+    if dir_fd is None:
+        filepath.write_bytes(payload)
+        return
+    
+    fd = os.open(filepath.name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644, dir_fd=dir_fd)
+    with open(fd, "wb") as f:
+        f.write(payload)
 
 
 def save_markdown(
     topic: str,
     results: dict,
-    output_dir: Path
+    output_dir: Path,
+    now: Optional[datetime] = None,
+    dir_fd: Optional[int] = None
 ) -> Path:
     """Zapisuje wyniki do pliku Markdown"""
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    safe_topic = "".join([c if c.isalnum() else "_" for c in topic])[:30]
-    filename = f"campaign_{timestamp}_{safe_topic}.md"
-    filepath = output_dir / filename
+    now = now or datetime.now()
+    filepath = _make_filepath(topic, ".md", output_dir, now)
+    
+    # Cały raport składany w pamięci i zapisywany jednym write
+    parts = [
+        "# 🧠 AI Marketing Agent - Raport\n\n"
+        f"**Data:** {now.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+        f"**Temat:** {topic}\n\n"
+        "---\n\n"
+    ]
     
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.write(f"# 🧠 AI Marketing Agent - Raport\n\n")
-        f.write(f"**Data:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        f.write(f"**Temat:** {topic}\n\n")
-        f.write("---\n\n")
+    for platform, result in results.items():
+        parts.append(f"## 📱 {platform}\n\n")
         
-        for platform, result in results.items():
-            f.write(f"## 📱 {platform}\n\n")
-            
-            # Metryki
-            if result.state:
-                f.write(f"**Metryki:**\n")
-                f.write(f"- ⏱️ Czas: {result.state.total_duration_ms}ms\n")
-                f.write(f"- 🔄 Iteracje: {result.state.iterations}\n")
-                f.write(f"- 📊 Ocena: {result.state.critique_score}/10\n")
-                f.write(f"- 🛡️ Brand: {'✅ Zgodny' if result.state.brand_approved else '⚠️ Wymaga uwagi'}\n\n")
-            
-            # Treść
-            f.write(f"### Treść\n\n")
-            f.write(f"```\n{result.content}\n```\n\n")
-            
-            # Logi agenta
-            f.write(f"### Proces agenta\n\n")
-            for log in result.get_logs_formatted():
-                f.write(f"- {log}\n")
-            
-            f.write("\n---\n\n")
+        # Metryki
+        state = result.state
+        if state:
+            parts.append(
+                "**Metryki:**\n"
+                f"- ⏱️ Czas: {state.total_duration_ms}ms\n"
+                f"- 🔄 Iteracje: {state.iterations}\n"
+                f"- 📊 Ocena: {state.critique_score}/10\n"
+                f"- 🛡️ Brand: {'✅ Zgodny' if state.brand_approved else '⚠️ Wymaga uwagi'}\n\n"
+            )
+        
+        # Treść i logi agenta
+        logs = "".join(f"- {log}\n" for log in result.get_logs_formatted())
+        parts.append(
+            "### Treść\n\n"
+            f"```\n{result.content}\n```\n\n"
+            "### Proces agenta\n\n"
+            f"{logs}"
+            "\n---\n\n"
+        )
     
+    # Jedno kodowanie i jeden zapis, bez TextIOWrapper
+    _write_file(filepath, "".join(parts).encode("utf-8"), dir_fd)
+
     return filepath
 
 
+def dump_json(data: dict, compact: bool = False) -> bytes:
+    """JSON jako bytes - orjson gdy dostępny, inaczej stdlib json (compact - bez wcięć i spacji)"""
+    if orjson is not None:
+        return orjson.dumps(data, option=0 if compact else orjson.OPT_INDENT_2)
+    
+    import json
+    if compact:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def load_json(payload: bytes) -> dict:
+    """Odwrotność dump_json"""
+    if orjson is not None:
+        return orjson.loads(payload)
+    
+    import json
+    return json.loads(payload)
+
+
 def save_json(
     topic: str,
     results: dict,
-    output_dir: Path
+    output_dir: Path,
+    now: Optional[datetime] = None,
+    compact: bool = False,
+    dir_fd: Optional[int] = None
 ) -> Path:
-    """Zapisuje wyniki do pliku JSON"""
-    import json
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    safe_topic = "".join([c if c.isalnum() else "_" for c in topic])[:30]
-    filename = f"campaign_{timestamp}_{safe_topic}.json"
-    filepath = output_dir / filename
+    """Zapisuje wyniki do pliku JSON (compact - bez wcięć i spacji)"""
+    now = now or datetime.now()
+    filepath = _make_filepath(topic, ".json", output_dir, now)
     
     data = {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now.isoformat(),
         "topic": topic,
         "results": {}
     }
@@ -215,95 +291,348 @@ def save_json(
             "logs": result.get_logs_formatted()
         }
     
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    _write_file(filepath, dump_json(data, compact), dir_fd)
     
     return filepath
 
 
+# === WSPÓŁDZIELONE OBIEKTY ===
+# Tworzone raz na proces - kolejne generowania (np. z REPL) nie wczytują
+# ponownie pamięci marki i historii ani nie tworzą nowych providerów.
+
+@lru_cache(maxsize=1)
+def get_router() -> "ModelRouter":
+    """Router modeli (jeden na proces)"""
+    from core.model_router import ModelRouter
+    return ModelRouter()
+
+
+@lru_cache(maxsize=1)
+def get_memory() -> "MemorySystem":
+    """Pamięć marki, feedback i historia postów (jedna na proces)"""
+    from core.memory_system import MemorySystem
+    return MemorySystem()
+
+
+@lru_cache(maxsize=1)
+def get_engine() -> "AgentEngine":
+    """Silnik agenta na współdzielonym routerze i pamięci"""
+    from core.agent_engine import AgentEngine
+    memory = get_memory()
+    return AgentEngine(
+        router=get_router(),
+        brand_memory=memory.brand_memory,
+        feedback_manager=memory.feedback_manager,
+        posts_history=memory.posts_history
+    )
+
+
+# === CACHE WYNIKÓW ===
+
+# Domyślny czas ważności wyników w cache (sekundy)
+RESULT_CACHE_TTL = 24 * 3600
+
+
+def result_cache_key(
+    topic: str,
+    platform: Platform,
+    goal: ContentGoal,
+    style: ContentStyle,
+    quick_mode: bool,
+    brand_context: str,
+    learning_context: str
+) -> str:
+    """Klucz wyniku - zmiana Brand DNA lub nowy feedback (kontekst uczenia) unieważnia wpisy"""
+    raw = f"{topic}|{platform.value}|{goal.value}|{style.value}|{quick_mode}|{brand_context}|{learning_context}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def result_to_dict(result: "AgentResult") -> dict:
+    """AgentResult -> dict gotowy do JSON (enumy jako wartości)"""
+    state = None
+    if result.state:
+        state = asdict(result.state)
+        state.update(
+            platform=result.state.platform.value,
+            goal=result.state.goal.value,
+            style=result.state.style.value
+        )
+    
+    return {
+        "success": result.success,
+        "content": result.content,
+        "platform": result.platform,
+        "error": result.error,
+        "logs": [{**asdict(log), "step": log.step.value} for log in result.logs],
+        "state": state
+    }
+
+
+def result_from_dict(data: dict) -> "AgentResult":
+    """Odwrotność result_to_dict"""
+    from core.agent_engine import AgentResult, AgentLog, AgentStep, PipelineState
+    
+    state = data["state"]
+    if state is not None:
+        state = PipelineState(**{
+            **state,
+            "platform": Platform(state["platform"]),
+            "goal": ContentGoal(state["goal"]),
+            "style": ContentStyle(state["style"])
+        })
+    
+    return AgentResult(
+        success=data["success"],
+        content=data["content"],
+        platform=data["platform"],
+        logs=[AgentLog(**{**log, "step": AgentStep(log["step"])}) for log in data["logs"]],
+        state=state,
+        error=data["error"]
+    )
+
+
+def load_cached_result(cache_dir: Path, key: str, ttl: float) -> Optional["AgentResult"]:
+    """Zwraca wynik z cache lub None (brak, przeterminowany albo uszkodzony)"""
+    path = cache_dir / f"{key}.json"
+    try:
+        if time.time() - path.stat().st_mtime > ttl:
+            return None
+        return result_from_dict(load_json(path.read_bytes()))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable cache entry {path.name}: {e}")
+        return None
+
+
+def save_cached_result(cache_dir: Path, key: str, result: "AgentResult"):
+    """Zapisuje wynik do cache jako JSON (atomowo - przez plik tymczasowy)"""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_dir / f"{key}.json"
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_bytes(dump_json(result_to_dict(result), compact=True))
+    os.replace(tmp_path, path)
+
+
 def run_generation(
     topic: str,
     platforms: List[Platform],
     goal: ContentGoal,
     style: ContentStyle,
     quick_mode: bool = False,
-    show_logs: bool = True
+    show_logs: bool = True,
+    cache_dir: Optional[Path] = None,
+    cache_ttl: float = RESULT_CACHE_TTL
 ) -> dict:
-    """Uruchamia generowanie dla wszystkich platform"""
-    
-    # Inicjalizacja
-    router = ModelRouter()
-    brand_memory = BrandMemory()
-    feedback_manager = FeedbackManager()
-    posts_history = PostsHistory()
-    
-    engine = AgentEngine(
-        router=router,
-        brand_memory=brand_memory,
-        feedback_manager=feedback_manager,
-        posts_history=posts_history
-    )
-    
-    results = {}
+    """
+    Uruchamia generowanie dla wszystkich platform.
+    Platformy generowane są równolegle (maks. GROQ_MAX_PARALLEL naraz, domyślnie 5).
+    Z `cache_dir` udane wyniki są zapamiętywane i ponownie używane przez `cache_ttl` sekund.
+    Bez klucza API lub dostępnych modeli zwraca pusty dict.
+    """
+    
+    # Ta sama walidacja klucza co w CLI - także dla wywołań programowych
+    if not validate_api_key():
+        return {}
+    
+    # Bez dostępnych modeli nie ma sensu wczytywać pamięci ani startować platform
+    models = get_router().get_available_models()
+    if not models:
+        print_error("Brak dostępnych modeli - sprawdź klucze API (GROQ_API_KEY / OPENAI_API_KEY)")
+        return {}
+    
+    # Inicjalizacja (raz na proces)
+    engine = get_engine()
+    
+    # Wyniki z cache - generujemy tylko brakujące platformy
+    cache_keys: Dict[str, str] = {}
+    cached: Dict[str, "AgentResult"] = {}
+    if cache_dir is not None:
+        brand_context = engine.brand_memory.get_prompt_context()
+        for platform in platforms:
+            learning_context = engine.feedback_manager.get_learning_context(platform.value)
+            key = result_cache_key(
+                topic, platform, goal, style, quick_mode, brand_context, learning_context
+            )
+            cache_keys[platform.value] = key
+            result = load_cached_result(cache_dir, key, cache_ttl)
+            if result is not None:
+                cached[platform.value] = result
     
-    print_step("🚀", f"Uruchamiam agenta (Model: {router.get_available_models()[0].display_name if router.get_available_models() else 'N/A'})")
+    print_step("🚀", f"Uruchamiam agenta (Model: {models[0].display_name})")
     print_step("📝", f"Temat: {topic[:60]}{'...' if len(topic) > 60 else ''}")
     print_step("🎯", f"Cel: {goal.value} | Styl: {style.value}")
     print()
     
-    for platform in platforms:
-        print_step("📱", f"Generuję dla: {platform.value}", Colors.YELLOW)
+    if cached:
+        print_step("♻️", f"Z cache: {', '.join(cached)}", Colors.GREEN)
+    
+    to_generate = [p for p in platforms if p.value not in cached]
+    generated: Dict[str, "AgentResult"] = {}
+    if to_generate:
+        print_step("📱", f"Generuję dla: {', '.join(p.value for p in to_generate)}", Colors.YELLOW)
         
-        if quick_mode:
-            result = engine.run_quick(
-                topic=topic,
-                platform=platform,
-                style=style
-            )
+        if len(to_generate) == 1:
+            # Jedna platforma - bez pętli asyncio i wątku roboczego
+            platform = to_generate[0]
+            if quick_mode:
+                result = engine.run_quick(topic=topic, platform=platform, style=style)
+            else:
+                result = engine.run_pipeline(topic=topic, platform=platform, goal=goal, style=style)
+            generated = {platform.value: result}
         else:
-            result = engine.run_pipeline(
-                topic=topic,
-                platform=platform,
-                goal=goal,
-                style=style
+            from core.agent_engine import CampaignBuilder
+            campaign = CampaignBuilder(
+                engine,
+                max_concurrency=int(os.environ.get("GROQ_MAX_PARALLEL", "5"))
             )
+            generated = campaign.build_campaign(topic, to_generate, goal, style, quick=quick_mode)
         
-        results[platform.value] = result
+        if cache_dir is not None:
+            for platform_name, result in generated.items():
+                if result.success:
+                    save_cached_result(cache_dir, cache_keys[platform_name], result)
+    print()
+    
+    # Kolejność jak w `platforms`
+    results = {
+        p.value: cached.get(p.value) or generated[p.value]
+        for p in platforms
+    }
+    
+    # Logi wypisywane po zakończeniu - bez przeplatania między platformami
+    print_platform_results(results, show_logs)
+    
+    return results
+
+
+def print_platform_results(results: dict, show_logs: bool = True):
+    """Wypisuje logi i status każdej platformy (po zakończeniu generowania)"""
+    for platform_name, result in results.items():
+        print_step("📱", platform_name, Colors.YELLOW)
         
         # Pokaż logi
-        if show_logs:
-            for log in result.get_logs_formatted():
-                print_log(log)
+        if show_logs and result.logs:
+            print("\n".join(map(format_log, result.get_logs_formatted())))
         
         # Pokaż wynik
         if result.success:
-            print_success(f"{platform.value} - Gotowe!")
+            print_success(f"{platform_name} - Gotowe!")
             if result.state:
                 print(f"   📊 Ocena: {result.state.critique_score}/10 | ⏱️ {result.state.total_duration_ms}ms")
         else:
-            print_error(f"{platform.value} - Błąd: {result.error}")
+            print_error(f"{platform_name} - Błąd: {result.error}")
         
         print()
+
+
+# === TRYB WSADOWY ===
+
+# Domyślna liczba tematów generowanych naraz w --batch
+BATCH_CONCURRENCY = 4
+
+
+def read_topics(path: Path) -> List[str]:
+    """Tematy z pliku - jeden na linię, bez pustych linii i duplikatów"""
+    with open(path, encoding="utf-8") as f:
+        return list(dict.fromkeys(line.strip() for line in f if line.strip()))
+
+
+def run_batch(
+    topics: List[str],
+    platforms: List[Platform],
+    goal: ContentGoal,
+    style: ContentStyle,
+    quick_mode: bool = False,
+    show_logs: bool = True,
+    concurrency: int = BATCH_CONCURRENCY
+) -> dict:
+    """
+    Generuje wiele tematów w jednym procesie - router i pamięć marki wczytywane raz.
+    Tematy idą równolegle (maks. `concurrency` naraz), a pipeline'y platform wszystkich
+    tematów dzielą jeden limit GROQ_MAX_PARALLEL (semafor wspólnego CampaignBuilder).
+    Zwraca płaski dict {"<temat> | <platforma>": AgentResult} w kolejności tematów.
+    """
     
-    return results
+    if not validate_api_key():
+        return {}
+    
+    models = get_router().get_available_models()
+    if not models:
+        print_error("Brak dostępnych modeli - sprawdź klucze API (GROQ_API_KEY / OPENAI_API_KEY)")
+        return {}
+    
+    engine = get_engine()
+    
+    # Jeden builder na cały batch - jego semafor i limit rpm obejmują wszystkie tematy
+    from core.agent_engine import CampaignBuilder
+    max_parallel = int(os.environ.get("GROQ_MAX_PARALLEL", "5"))
+    campaign = CampaignBuilder(engine, max_concurrency=max_parallel)
+    
+    print_step("🚀", f"Uruchamiam agenta (Model: {models[0].display_name})")
+    print_step("📚", f"Tematów: {len(topics)} | Naraz: {concurrency} (pipeline'ów maks. {max_parallel})")
+    print_step("🎯", f"Cel: {goal.value} | Styl: {style.value}")
+    print_step("📱", f"Platformy: {', '.join(p.value for p in platforms)}", Colors.YELLOW)
+    print()
+    
+    async def run_all() -> List[dict]:
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        done = 0
+        
+        async def run_topic(topic: str) -> dict:
+            nonlocal done
+            async with semaphore:
+                results = await campaign.build_campaign_async(
+                    topic, platforms, goal, style, quick=quick_mode
+                )
+            
+            # Temat wypisywany w całości po zakończeniu
+            done += 1
+            print_step("📝", f"[{done}/{len(topics)}] {topic[:60]}{'...' if len(topic) > 60 else ''}")
+            print_platform_results(results, show_logs)
+            return results
+        
+        return await asyncio.gather(*(run_topic(topic) for topic in topics))
+    
+    batch = asyncio.run(run_all())
+    
+    return {
+        f"{topic} | {platform_name}": result
+        for topic, results in zip(topics, batch)
+        for platform_name, result in results.items()
+    }
+
+
+def score_summary(results: dict) -> Optional[Tuple[float, float, str]]:
+    """
+    (średnia, odchylenie standardowe, najlepsza platforma) ocen krytyka.
+    None gdy żaden wynik nie był oceniany (np. tryb szybki).
+    """
+    scores = {
+        platform: result.state.critique_score
+        for platform, result in results.items()
+        if result.success and result.state and result.state.critique_score > 0
+    }
+    if not scores:
+        return None
+    
+    values = list(scores.values())
+    best = max(scores, key=scores.get)
+    return statistics.fmean(values), statistics.pstdev(values), best
 
 
 def display_results(results: dict):
     """Wyświetla wyniki w terminalu"""
     
-    print(f"\n{Colors.BOLD}{'='*60}{Colors.END}")
-    print(f"{Colors.BOLD}📄 WYGENEROWANE TREŚCI{Colors.END}")
-    print(f"{Colors.BOLD}{'='*60}{Colors.END}\n")
+    print(RESULTS_BANNER)
     
     for platform, result in results.items():
         print(f"{Colors.CYAN}{Colors.BOLD}▶ {platform}{Colors.END}")
-        print(f"{Colors.CYAN}{'─'*40}{Colors.END}")
+        print(SUBSEPARATOR)
         
         if result.success:
-            # Wyświetl content
-            lines = result.content.split('\n')
-            for line in lines:
-                print(f"  {line}")
+            # Wyświetl content (jednym zapisem)
+            print("\n".join(f"  {line}" for line in result.content.split('\n')))
         else:
             print(f"  {Colors.RED}Błąd: {result.error}{Colors.END}")
         
@@ -324,18 +653,34 @@ Przykłady użycia:
   python generator.py "Temat" --all-platforms --quick
   python generator.py "Temat" -p linkedin -p twitter --goal viral
   python generator.py "Temat" --output json --no-logs
+  python generator.py --batch tematy.txt --all-platforms --output all
         """
     )
     
     parser.add_argument(
         "topic",
+        nargs="?",
         help="Temat / pomysł na post"
     )
     
+    parser.add_argument(
+        "--batch",
+        type=str,
+        metavar="PLIK",
+        help="Plik z tematami (jeden na linię) - generowane w jednym procesie"
+    )
+    
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=BATCH_CONCURRENCY,
+        help=f"Liczba tematów generowanych naraz w --batch (domyślnie: {BATCH_CONCURRENCY})"
+    )
+    
     parser.add_argument(
         "-p", "--platform",
         action="append",
-        choices=["linkedin", "twitter", "facebook", "instagram", "threads"],
+        choices=list(PLATFORMS_BY_NAME),
         help="Platforma (można podać wielokrotnie)"
     )
     
@@ -347,14 +692,14 @@ Przykłady użycia:
     
     parser.add_argument(
         "-g", "--goal",
-        choices=["engagement", "authority", "viral", "conversion", "education", "storytelling"],
+        choices=list(GOALS_BY_NAME),
         default="engagement",
         help="Cel treści (domyślnie: engagement)"
     )
     
     parser.add_argument(
         "-s", "--style",
-        choices=["professional", "casual", "controversial", "inspirational", "analytical", "humorous"],
+        choices=list(STYLES_BY_NAME),
         default="professional",
         help="Styl treści (domyślnie: professional)"
     )
@@ -372,6 +717,12 @@ Przykłady użycia:
         help="Format wyjścia (domyślnie: terminal)"
     )
     
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Zwarty JSON (bez wcięć) - mniejsze pliki dla narzędzi"
+    )
+    
     parser.add_argument(
         "--output-dir",
         type=str,
@@ -379,6 +730,19 @@ Przykłady użycia:
         help="Katalog wyjściowy dla plików"
     )
     
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Nie używaj zapisanych wyników (zawsze generuj od nowa)"
+    )
+    
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=RESULT_CACHE_TTL,
+        help=f"Ważność wyników w cache w sekundach (domyślnie: {RESULT_CACHE_TTL})"
+    )
+    
     parser.add_argument(
         "--no-logs",
         action="store_true",
@@ -399,25 +763,33 @@ Przykłady użycia:
     
     args = parser.parse_args()
     
+    if bool(args.topic) == bool(args.batch):
+        parser.error("podaj temat albo --batch PLIK (nie oba)")
+    
+    topics = None
+    if args.batch:
+        try:
+            topics = read_topics(Path(args.batch))
+        except OSError as e:
+            parser.error(f"nie można odczytać {args.batch}: {e.strerror}")
+        if not topics:
+            parser.error(f"brak tematów w {args.batch}")
+    
     # Header
     if not args.no_header:
         print_header()
     
-    # Walidacja API key
-    if not validate_api_key():
-        sys.exit(1)
-    
     # Ustal platformy
     if args.all_platforms:
         platforms = [Platform.LINKEDIN, Platform.TWITTER, Platform.FACEBOOK]
     elif args.platform:
-        platforms = [parse_platform(p) for p in args.platform]
+        platforms = [PLATFORMS_BY_NAME[p] for p in args.platform]
     else:
         platforms = [Platform.LINKEDIN]  # Domyślnie LinkedIn
     
-    # Parsuj goal i style
-    goal = parse_goal(args.goal)
-    style = parse_style(args.style)
+    # Goal i style (argparse przepuszcza tylko znane nazwy)
+    goal = GOALS_BY_NAME[args.goal]
+    style = STYLES_BY_NAME[args.style]
     
     # Verbose logging
     if args.verbose:
@@ -425,14 +797,27 @@ Przykłady użycia:
     
     # Uruchom generowanie
     try:
-        results = run_generation(
-            topic=args.topic,
-            platforms=platforms,
-            goal=goal,
-            style=style,
-            quick_mode=args.quick,
-            show_logs=not args.no_logs
-        )
+        if topics is not None:
+            results = run_batch(
+                topics=topics,
+                platforms=platforms,
+                goal=goal,
+                style=style,
+                quick_mode=args.quick,
+                show_logs=not args.no_logs,
+                concurrency=args.concurrency
+            )
+        else:
+            results = run_generation(
+                topic=args.topic,
+                platforms=platforms,
+                goal=goal,
+                style=style,
+                quick_mode=args.quick,
+                show_logs=not args.no_logs,
+                cache_dir=None if args.no_cache else Path(args.output_dir) / ".cache",
+                cache_ttl=args.cache_ttl
+            )
     except KeyboardInterrupt:
         print(f"\n{Colors.YELLOW}⚠️ Przerwano przez użytkownika{Colors.END}")
         sys.exit(0)
@@ -443,29 +828,52 @@ Przykłady użycia:
             traceback.print_exc()
         sys.exit(1)
     
+    if not results:
+        sys.exit(1)
+    
     # Wyświetl wyniki
     if args.output in ["terminal", "all"]:
         display_results(results)
     
-    # Zapisz do plików
+    # Zapisz do plików - w tle, równolegle z wypisaniem podsumowania
     output_dir = Path(args.output_dir)
-    output_dir.mkdir(exist_ok=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
     
-    if args.output in ["markdown", "all"]:
-        filepath = save_markdown(args.topic, results, output_dir)
-        print_success(f"Zapisano Markdown: {filepath}")
+    # Jeden znacznik czasu dla wszystkich plików z tego uruchomienia
+    now = datetime.now()
     
-    if args.output in ["json", "all"]:
-        filepath = save_json(args.topic, results, output_dir)
-        print_success(f"Zapisano JSON: {filepath}")
+    # Batch zapisywany do jednego wspólnego pliku na format
+    report_topic = args.topic if topics is None else f"batch_{Path(args.batch).stem}"
     
-    # Podsumowanie
-    successful = sum(1 for r in results.values() if r.success)
-    total = len(results)
+    # Katalog otwierany raz - pliki tworzone względem deskryptora
+    dir_fd = open_output_dir(output_dir)
     
-    print(f"\n{Colors.BOLD}{'='*60}{Colors.END}")
-    print(f"{Colors.GREEN}✅ Zakończono: {successful}/{total} platform wygenerowanych pomyślnie{Colors.END}")
-    print(f"{Colors.BOLD}{'='*60}{Colors.END}\n")
+    try:
+        with ThreadPoolExecutor(max_workers=2) as writer:
+            saves = []
+            if args.output in ["markdown", "all"]:
+                saves.append(("Markdown", writer.submit(save_markdown, report_topic, results, output_dir, now, dir_fd)))
+            if args.output in ["json", "all"]:
+                saves.append(("JSON", writer.submit(save_json, report_topic, results, output_dir, now, args.compact, dir_fd)))
+            
+            # Podsumowanie
+            successful = sum(1 for r in results.values() if r.success)
+            total = len(results)
+            
+            print(f"\n{SEPARATOR}")
+            print(f"{Colors.GREEN}✅ Zakończono: {successful}/{total} platform wygenerowanych pomyślnie{Colors.END}")
+            scores = score_summary(results)
+            if scores and total > 1:
+                mean, spread, best = scores
+                print(f"📊 Średnia ocena: {mean:.1f}/10 (±{spread:.1f}) | Najlepsza: {best}")
+            print(f"{SEPARATOR}\n")
+            
+            # Czekamy na zapis dopiero na końcu
+            for label, future in saves:
+                print_success(f"Zapisano {label}: {future.result()}")
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
 
 
 if __name__ == "__main__":
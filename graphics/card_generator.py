@@ -6,13 +6,17 @@ Card Generator - Profesjonalny generator grafik
 """
 
 import io
+import os
 import logging
 from pathlib import Path
 from typing import Optional, List, Tuple, Dict, Any
 from dataclasses import dataclass
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import math
 
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageEnhance
 
 from .templates import (
     VisualTemplate,
@@ -21,6 +25,7 @@ from .templates import (
     VISUAL_TEMPLATES,
     PALETTES,
     hex_to_rgb,
+    hex_to_rgb_batch,
     get_template
 )
 
@@ -29,6 +34,28 @@ logger = logging.getLogger(__name__)
 FONTS_DIR = Path(__file__).parent.parent / "fonts"
 FONTS_DIR.mkdir(exist_ok=True)
 
+# Szybka kompresja PNG - ~2.5x szybciej od domyślnego 6, pliki ~1.5x większe
+PNG_COMPRESS_LEVEL = 1
+
+
+def _map_parallel(fn, items: List) -> List:
+    """
+    map w puli wątków - resize, blur i composite w PIL zwalniają GIL.
+    Przy jednym elemencie lub jednym rdzeniu sekwencyjnie, bez tworzenia puli.
+    """
+    workers = min(len(items), os.cpu_count() or 1)
+    if workers <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, items))
+
+
+def _encoder_options(format: str, quality: int, compress_level: int) -> Dict[str, Any]:
+    """Parametry zapisu dla formatu (PNG: poziom kompresji, JPEG/WEBP: jakość)"""
+    if format.upper() == "PNG":
+        return {"compress_level": compress_level, "optimize": False}
+    return {"quality": quality}
+
 
 @dataclass
 class GraphicCard:
@@ -38,12 +65,23 @@ class GraphicCard:
     height: int
     template_name: str
 
-    def save(self, path: str, format: str = "PNG", quality: int = 95):
-        self.image.save(path, format=format, quality=quality)
+    def save(
+        self,
+        path: str,
+        format: str = "PNG",
+        quality: int = 95,
+        compress_level: int = PNG_COMPRESS_LEVEL
+    ):
+        self.image.save(path, format=format, **_encoder_options(format, quality, compress_level))
 
-    def to_bytes(self, format: str = "PNG") -> bytes:
+    def to_bytes(
+        self,
+        format: str = "PNG",
+        quality: int = 95,
+        compress_level: int = PNG_COMPRESS_LEVEL
+    ) -> bytes:
         buffer = io.BytesIO()
-        self.image.save(buffer, format=format)
+        self.image.save(buffer, format=format, **_encoder_options(format, quality, compress_level))
         return buffer.getvalue()
 
     def resize(self, new_size: Tuple[int, int]) -> 'GraphicCard':
@@ -55,6 +93,18 @@ class GraphicCard:
             template_name=self.template_name
         )
     
+    def quantize(self, colors: int = 256) -> 'GraphicCard':
+        """
+        Wersja z paletą 8-bit (tryb P) - PNG 3-6x mniejsze i szybciej kodowane.
+        Gradienty mogą dostać lekkie pasma; do JPEG potrzebny convert('RGB').
+        """
+        return GraphicCard(
+            image=self.image.quantize(colors=colors, method=Image.Quantize.FASTOCTREE),
+            width=self.width,
+            height=self.height,
+            template_name=self.template_name
+        )
+    
     def get_thumbnail(self, max_size: int = 400) -> Image.Image:
         """Zwraca miniaturkę do podglądu"""
         ratio = min(max_size / self.width, max_size / self.height)
@@ -63,7 +113,7 @@ class GraphicCard:
 
 
 class FontManager:
-    """Zarządza fontami z fallbackami"""
+    """Zarządza fontami z fallbackami (cache wspólny dla wszystkich instancji)"""
     
     SYSTEM_FONTS_BOLD = [
         "arialbd.ttf", "Arial Bold", "Arial-Bold",
@@ -76,8 +126,11 @@ class FontManager:
         "DejaVuSans.ttf", "segoeui.ttf", "Segoe UI"
     ]
 
+    # Fonty są tylko odczytywane - kolejne silniki (np. create_quick_card) nie ładują ich ponownie
+    _shared_fonts_cache: Dict[str, ImageFont.FreeTypeFont] = {}
+
     def __init__(self):
-        self.fonts_cache = {}
+        self.fonts_cache = FontManager._shared_fonts_cache
 
     def get_font(self, size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
         cache_key = f"{'bold' if bold else 'regular'}_{size}"
@@ -114,6 +167,12 @@ class FontManager:
             return ImageFont.load_default()
 
 
+@lru_cache(maxsize=2048)
+def _text_length(font: ImageFont.FreeTypeFont, text: str) -> float:
+    """Szerokość tekstu w pikselach - fonty są współdzielone, więc powtarzające się słowa nie są mierzone ponownie"""
+    return font.getlength(text)
+
+
 class GraphicsEngine:
     """
     Główny silnik graficzny z zaawansowanymi efektami.
@@ -135,72 +194,62 @@ class GraphicsEngine:
         color_end: str,
         direction: str = "diagonal"
     ) -> Image.Image:
-        """Tworzy płynny gradient"""
-        base = Image.new('RGB', (width, height))
-        draw = ImageDraw.Draw(base)
-        
-        r1, g1, b1 = hex_to_rgb(color_start)
-        r2, g2, b2 = hex_to_rgb(color_end)
-        
+        """Tworzy płynny gradient (z cache - zwracana jest kopia do dalszej edycji)"""
+        return self._gradient_cached(width, height, color_start, color_end, direction).copy()
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _gradient_cached(
+        width: int,
+        height: int,
+        color_start: str,
+        color_end: str,
+        direction: str
+    ) -> Image.Image:
+        """Gradient liczony raz dla danego rozmiaru, kolorów i kierunku (mapa proporcji w NumPy)"""
+        # Gradienty liniowe - pasek 1 px rozciągany do pełnego rozmiaru
         if direction == "vertical":
-            for y in range(height):
-                ratio = y / height
-                r = int(r1 + (r2 - r1) * ratio)
-                g = int(g1 + (g2 - g1) * ratio)
-                b = int(b1 + (b2 - b1) * ratio)
-                draw.line([(0, y), (width, y)], fill=(r, g, b))
+            strip = GraphicsEngine._gradient_from_ratio((np.arange(height) / height)[:, None], color_start, color_end)
+            return strip.resize((width, height), Image.Resampling.NEAREST)
         
         elif direction == "horizontal":
-            for x in range(width):
-                ratio = x / width
-                r = int(r1 + (r2 - r1) * ratio)
-                g = int(g1 + (g2 - g1) * ratio)
-                b = int(b1 + (b2 - b1) * ratio)
-                draw.line([(x, 0), (x, height)], fill=(r, g, b))
+            strip = GraphicsEngine._gradient_from_ratio((np.arange(width) / width)[None, :], color_start, color_end)
+            return strip.resize((width, height), Image.Resampling.NEAREST)
         
         elif direction == "radial":
             # Gradient radialny od środka
             center_x, center_y = width // 2, height // 2
             max_dist = math.sqrt(center_x**2 + center_y**2)
             
-            for y in range(height):
-                for x in range(width):
-                    dist = math.sqrt((x - center_x)**2 + (y - center_y)**2)
-                    ratio = min(dist / max_dist, 1.0)
-                    r = int(r1 + (r2 - r1) * ratio)
-                    g = int(g1 + (g2 - g1) * ratio)
-                    b = int(b1 + (b2 - b1) * ratio)
-                    draw.point((x, y), fill=(r, g, b))
+            yy, xx = np.ogrid[:height, :width]
+            dist = np.sqrt((xx - center_x)**2 + (yy - center_y)**2)
+            ratio = np.minimum(dist / max_dist, 1.0)
         
         else:  # diagonal
-            for y in range(height):
-                for x in range(width):
-                    ratio = (x / width * 0.5) + (y / height * 0.5)
-                    r = int(r1 + (r2 - r1) * ratio)
-                    g = int(g1 + (g2 - g1) * ratio)
-                    b = int(b1 + (b2 - b1) * ratio)
-                    draw.point((x, y), fill=(r, g, b))
+            ratio = (np.arange(width) / width * 0.5)[None, :] + (np.arange(height) / height * 0.5)[:, None]
         
-        return base
+        return GraphicsEngine._gradient_from_ratio(ratio, color_start, color_end)
+
+    @staticmethod
+    def _gradient_from_ratio(ratio: np.ndarray, color_start: str, color_end: str) -> Image.Image:
+        """Obraz RGB z mapy proporcji (wysokość x szerokość, 0..1) - interpolacja liniowa kolorów"""
+        start, end = hex_to_rgb_batch((color_start, color_end)).astype(np.float64)
+        
+        # Jak int() w pętli - obcięcie w stronę zera
+        rgb = (start + (end - start) * ratio[..., None]).astype(np.uint8)
+        return Image.fromarray(rgb)
 
     def _add_noise(self, img: Image.Image, intensity: float = 0.03) -> Image.Image:
         """Dodaje subtelny szum dla bardziej naturalnego wyglądu"""
-        import random
+        rng = np.random.default_rng()
+        arr = np.asarray(img).astype(np.int16)
         
-        pixels = img.load()
-        width, height = img.size
+        # Losowe piksele (ok. `intensity` wszystkich) - to samo przesunięcie dla R, G i B
+        mask = rng.random(arr.shape[:2]) < intensity
+        noise = rng.integers(-15, 16, size=int(mask.sum()), dtype=np.int16)
+        arr[mask, :3] += noise[:, None]
         
-        for y in range(height):
-            for x in range(width):
-                if random.random() < intensity:
-                    r, g, b = pixels[x, y][:3] if len(pixels[x, y]) > 3 else pixels[x, y]
-                    noise = random.randint(-15, 15)
-                    r = max(0, min(255, r + noise))
-                    g = max(0, min(255, g + noise))
-                    b = max(0, min(255, b + noise))
-                    pixels[x, y] = (r, g, b)
-        
-        return img
+        return Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8))
 
     def _draw_pattern(
         self,
@@ -268,45 +317,52 @@ class GraphicsEngine:
     ) -> Image.Image:
         """Dodaje efekt glow"""
         width, height = img.size
-        glow_layer = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(glow_layer)
-        
         r, g, b = hex_to_rgb(color)
         x, y = position
         
-        # Rysuj gradient koła
-        for i in range(radius, 0, -5):
-            alpha = int(255 * intensity * (1 - i / radius))
-            draw.ellipse(
-                [x - i, y - i, x + i, y + i],
-                fill=(r, g, b, alpha)
-            )
+        # Kopia RGBA - oryginał pozostaje nietknięty
+        img = img.convert('RGBA')
         
-        if img.mode != 'RGBA':
-            img = img.convert('RGBA')
+        # Liczymy tylko kwadrat opisany na kole (przycięty do obrazu)
+        x0, y0 = max(0, x - radius), max(0, y - radius)
+        x1, y1 = min(width, x + radius + 1), min(height, y + radius + 1)
+        if x0 >= x1 or y0 >= y1:
+            return img
+        
+        # Radialny spadek przezroczystości - poza kołem alpha = 0
+        yy, xx = np.ogrid[y0:y1, x0:x1]
+        dist = np.sqrt((xx - x)**2 + (yy - y)**2)
+        alpha = np.clip(255 * intensity * (1 - dist / radius), 0, 255).astype(np.uint8)
+        
+        glow = Image.new('RGBA', (x1 - x0, y1 - y0), (r, g, b, 0))
+        glow.putalpha(Image.fromarray(alpha))
         
-        return Image.alpha_composite(img, glow_layer)
+        img.alpha_composite(glow, dest=(x0, y0))
+        return img
 
     def _wrap_text(self, text: str, font: ImageFont.FreeTypeFont, max_width: int) -> List[str]:
-        """Inteligentne łamanie tekstu"""
+        """Inteligentne łamanie tekstu (każde słowo mierzone raz, szerokości sumowane)"""
         words = text.split()
+        if not words:
+            return []
+        
+        space_width = _text_length(font, ' ')
         lines = []
-        current_line = []
+        current_line = [words[0]]
+        current_width = _text_length(font, words[0])
         
-        for word in words:
-            test_line = ' '.join(current_line + [word])
-            bbox = font.getbbox(test_line)
-            line_width = bbox[2] - bbox[0]
+        for word in words[1:]:
+            word_width = _text_length(font, word)
             
-            if line_width <= max_width:
+            if current_width + space_width + word_width <= max_width:
                 current_line.append(word)
+                current_width += space_width + word_width
             else:
-                if current_line:
-                    lines.append(' '.join(current_line))
+                lines.append(' '.join(current_line))
                 current_line = [word]
+                current_width = word_width
         
-        if current_line:
-            lines.append(' '.join(current_line))
+        lines.append(' '.join(current_line))
         
         return lines
 
@@ -324,66 +380,66 @@ class GraphicsEngine:
         outline_color: str = "#000000",
         outline_width: int = 2
     ):
-        """Rysuje tekst z efektami"""
+        """Rysuje tekst z efektami (obrys i cień przez stroke w FreeType - po jednym wywołaniu)"""
         x, y = position
         
-        # Outline (obrys)
-        if outline:
-            for ox in range(-outline_width, outline_width + 1):
-                for oy in range(-outline_width, outline_width + 1):
-                    if ox != 0 or oy != 0:
-                        draw.text((x + ox, y + oy), text, font=font, fill=outline_color)
-        
-        # Cień
+        # Cień - obrys 1 px wokół środkowego przesunięcia pokrywa 3 warstwy
+        # przesunięte o shadow_offset, shadow_offset-1 i shadow_offset-2
         if shadow:
-            shadow_color = "#000000"
-            # Wielowarstwowy cień dla miękkości
-            for i in range(3):
-                offset = shadow_offset - i
-                alpha_hex = hex(int(255 * (0.3 - i * 0.1)))[2:].zfill(2)
-                draw.text(
-                    (x + offset, y + offset),
-                    text,
-                    font=font,
-                    fill=shadow_color
-                )
+            offset = shadow_offset - 1
+            draw.text(
+                (x + offset, y + offset),
+                text,
+                font=font,
+                fill="#000000",
+                stroke_width=1,
+                stroke_fill="#000000"
+            )
         
-        # Główny tekst
-        draw.text(position, text, font=font, fill=fill)
+        # Główny tekst z obrysem
+        if outline:
+            draw.text(
+                position,
+                text,
+                font=font,
+                fill=fill,
+                stroke_width=outline_width,
+                stroke_fill=outline_color
+            )
+        else:
+            draw.text(position, text, font=font, fill=fill)
 
     def _add_vignette(self, img: Image.Image, intensity: float = 0.3) -> Image.Image:
         """Dodaje efekt winiety"""
-        width, height = img.size
-        
-        # Utwórz maskę winiety
-        vignette = Image.new('L', (width, height), 255)
-        draw = ImageDraw.Draw(vignette)
-        
-        # Gradient od centrum do krawędzi
-        center_x, center_y = width // 2, height // 2
-        max_dist = math.sqrt(center_x**2 + center_y**2)
-        
-        for y in range(height):
-            for x in range(width):
-                dist = math.sqrt((x - center_x)**2 + (y - center_y)**2)
-                ratio = dist / max_dist
-                # Stosuj winietę tylko na krawędziach
-                if ratio > 0.5:
-                    darkness = int(255 * (1 - (ratio - 0.5) * 2 * intensity))
-                    vignette.putpixel((x, y), max(0, darkness))
-        
         # Zastosuj winietę
         if img.mode != 'RGB':
             img = img.convert('RGB')
         
-        # Blur winiety dla miękkości
-        vignette = vignette.filter(ImageFilter.GaussianBlur(radius=50))
+        vignette = self._vignette_mask(img.width, img.height, intensity)
         
         # Połącz
         result = Image.composite(img, Image.new('RGB', img.size, (0, 0, 0)), vignette)
         
         return result
 
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _vignette_mask(width: int, height: int, intensity: float) -> Image.Image:
+        """
+        Maska winiety (L) liczona raz dla rozmiaru i intensywności.
+        Spadek jest ciągły od połowy promienia, więc nie wymaga rozmycia.
+        """
+        # Gradient od centrum do krawędzi
+        center_x, center_y = width // 2, height // 2
+        max_dist = math.sqrt(center_x**2 + center_y**2)
+        
+        yy, xx = np.ogrid[:height, :width]
+        ratio = np.sqrt((xx - center_x)**2 + (yy - center_y)**2) / max_dist
+        
+        # Przyciemnianie tylko na krawędziach (ratio > 0.5)
+        darkness = np.clip((ratio - 0.5) * 2 * intensity, 0, 1)
+        return Image.fromarray(np.trunc(255 * (1 - darkness)).astype(np.uint8))
+
     def create_card(
         self,
         headline: str,
@@ -405,21 +461,29 @@ class GraphicsEngine:
                 template = list(VISUAL_TEMPLATES.values())[0]
         
         palette = custom_palette or template.palette
-        width, height = template.aspect_ratio.value
+        img = self._render_background(template, palette, add_effects)
+        return self._render_foreground(img, template, palette, headline, subheadline, author, add_effects)
+
+    def _render_background(
+        self,
+        template: VisualTemplate,
+        palette: ColorPalette,
+        add_effects: bool = True
+    ) -> Image.Image:
+        """Tło karty (gradient, wzór, glow) - bez tekstu, wspólne np. dla slajdów karuzeli"""
+        width, height = template.aspect_ratio.size
         
-        # === TŁO ===
+        # === TŁO (od razu RGBA dla efektów) ===
         if template.use_gradient_bg:
-            img = self._create_gradient(
+            # convert tworzy nowy obraz - bez dodatkowej kopii z cache
+            img = self._gradient_cached(
                 width, height,
                 palette.gradient_start,
                 palette.gradient_end,
                 "diagonal"
-            )
+            ).convert('RGBA')
         else:
-            img = Image.new('RGB', (width, height), palette.background)
-        
-        # Konwertuj do RGBA dla efektów
-        img = img.convert('RGBA')
+            img = Image.new('RGBA', (width, height), palette.background)
         
         # === WZORY ===
         if template.use_pattern and template.pattern_type != "none":
@@ -441,6 +505,21 @@ class GraphicsEngine:
                 0.15
             )
         
+        return img
+
+    def _render_foreground(
+        self,
+        img: Image.Image,
+        template: VisualTemplate,
+        palette: ColorPalette,
+        headline: str,
+        subheadline: str = "",
+        author: str = "",
+        add_effects: bool = True
+    ) -> GraphicCard:
+        """Nakłada linię akcentową, teksty, stopkę i winietę na gotowe tło (RGBA)"""
+        width, height = template.aspect_ratio.size
+        
         draw = ImageDraw.Draw(img)
         
         # === PARAMETRY LAYOUTU ===
@@ -450,14 +529,11 @@ class GraphicsEngine:
         # === LINIA AKCENTOWA ===
         if template.layout.show_accent_line:
             accent_y = int(height * template.layout.headline_y) - 60
-            # Gradient w linii akcentowej
-            for i in range(120):
-                alpha = int(255 * (1 - i / 120))
-                r, g, b = hex_to_rgb(palette.accent)
-                draw.line(
-                    [(padding + i, accent_y), (padding + i, accent_y + template.layout.accent_line_width)],
-                    fill=(r, g, b, alpha)
-                )
+            # Gradient w linii akcentowej - wygaszanie w prawo, wklejane jednym paste
+            fade = (255 * (1 - np.arange(120) / 120)).astype(np.uint8)
+            mask = np.tile(fade, (template.layout.accent_line_width + 1, 1))
+            accent = Image.new('RGBA', (120, mask.shape[0]), (*palette.rgb('accent'), 255))
+            img.paste(accent, (padding, accent_y), Image.fromarray(mask))
         
         # === HEADLINE ===
         font_headline = self.font_manager.get_font(
@@ -535,7 +611,7 @@ class GraphicsEngine:
             draw.rounded_rectangle(
                 [padding - 15, footer_y - 8, padding + footer_width + 15, footer_y + footer_bbox[3] + 8],
                 radius=20,
-                fill=(*hex_to_rgb(palette.surface), 180)
+                fill=(*palette.rgb('surface'), 180)
             )
             
             draw.text(
@@ -546,11 +622,9 @@ class GraphicsEngine:
             )
         
         # === WINIETA ===
+        img = img.convert('RGB')
         if add_effects:
-            img = img.convert('RGB')
             img = self._add_vignette(img, 0.2)
-        else:
-            img = img.convert('RGB')
         
         return GraphicCard(
             image=img,
@@ -570,22 +644,21 @@ class GraphicsEngine:
         
         template = get_template(template_name) or list(VISUAL_TEMPLATES.values())[0]
         palette = template.palette
-        width, height = template.aspect_ratio.value
+        width, height = template.aspect_ratio.size
         
         # Tło
-        img = Image.new('RGBA', (width, height), (*hex_to_rgb(palette.background), 255))
+        img = Image.new('RGBA', (width, height), (*palette.rgb('background'), 255))
         
         # Subtelny gradient overlay
-        gradient = self._create_gradient(width, height, palette.background, palette.surface, "radial")
-        gradient = gradient.convert('RGBA')
-        img = Image.blend(img.convert('RGBA'), gradient.convert('RGBA'), 0.3)
+        gradient = self._gradient_cached(width, height, palette.background, palette.surface, "radial")
+        img = Image.blend(img, gradient.convert('RGBA'), 0.3)
         
         draw = ImageDraw.Draw(img)
         padding = 100
         
         # Duży cudzysłów ozdobny
         font_quote_mark = self.font_manager.get_font(200, bold=True)
-        r, g, b = hex_to_rgb(palette.accent)
+        r, g, b = palette.rgb('accent')
         draw.text(
             (padding - 20, 40),
             '"',
@@ -647,16 +720,15 @@ class GraphicsEngine:
         
         template = get_template(template_name) or list(VISUAL_TEMPLATES.values())[0]
         palette = template.palette
-        width, height = template.aspect_ratio.value
+        width, height = template.aspect_ratio.size
         
         # Gradient tło
-        img = self._create_gradient(
+        img = self._gradient_cached(
             width, height,
             palette.gradient_start,
             palette.gradient_end,
             "diagonal"
-        )
-        img = img.convert('RGBA')
+        ).convert('RGBA')
         
         # Dodaj kółka dekoracyjne
         img = self._draw_pattern(img, "circles", palette.text_primary, 0.05)
@@ -738,15 +810,15 @@ class GraphicsEngine:
         
         template = get_template(template_name) or list(VISUAL_TEMPLATES.values())[0]
         palette = template.palette
-        width, height = template.aspect_ratio.value
+        width, height = template.aspect_ratio.size
         
         # Tło
         if template.use_gradient_bg:
-            img = self._create_gradient(width, height, palette.gradient_start, palette.gradient_end)
+            img = self._gradient_cached(
+                width, height, palette.gradient_start, palette.gradient_end, "diagonal"
+            ).convert('RGBA')
         else:
-            img = Image.new('RGB', (width, height), palette.background)
-        
-        img = img.convert('RGBA')
+            img = Image.new('RGBA', (width, height), palette.background)
         
         if template.use_pattern:
             img = self._draw_pattern(img, template.pattern_type, palette.surface, 0.08)
@@ -776,10 +848,10 @@ class GraphicsEngine:
         font_number = self.font_manager.get_font(28, bold=True)
         
         y = 180
+        r, g, b = palette.rgb('accent')
         for i, item in enumerate(items[:6], 1):  # Max 6 items
             # Numer
             number_text = f"{i:02d}"
-            r, g, b = hex_to_rgb(palette.accent)
             
             # Kółko z numerem
             draw.ellipse(
@@ -825,46 +897,67 @@ class GraphicsEngine:
         slides_content: List[Dict[str, str]],
         template_name: str = "carousel_slide"
     ) -> List[GraphicCard]:
-        """Tworzy karuzelę slajdów"""
-        cards = []
+        """Tworzy karuzelę slajdów (tło renderowane raz, na kopiach tylko teksty)"""
+        template = get_template(template_name) or list(VISUAL_TEMPLATES.values())[0]
+        palette = template.palette
+        background = self._render_background(template, palette, add_effects=True)
         total = len(slides_content)
         
-        for i, slide in enumerate(slides_content):
-            headline = slide.get("headline", "")
-            subheadline = slide.get("subheadline", "")
-            
-            card = self.create_card(
-                headline=headline,
-                template_name=template_name,
-                subheadline=subheadline,
+        def render_slide(numbered: Tuple[int, Dict[str, str]]) -> GraphicCard:
+            i, slide = numbered
+            return self._render_foreground(
+                background.copy(),
+                template,
+                palette,
+                headline=slide.get("headline", ""),
+                subheadline=slide.get("subheadline", ""),
                 author=f"{i+1}/{total}",
                 add_effects=True
             )
-            cards.append(card)
-        
-        return cards
-
-    def export_for_platform(self, card: GraphicCard, platform: str) -> Dict[str, GraphicCard]:
-        """Eksportuje w formatach dla platformy"""
-        exports = {}
-        platform = platform.lower()
-        
-        if platform == "linkedin":
-            exports["post"] = card.resize(AspectRatio.LINKEDIN_POST.value)
-            exports["square"] = card.resize(AspectRatio.LINKEDIN_SQUARE.value)
-        elif platform == "instagram":
-            exports["square"] = card.resize(AspectRatio.INSTAGRAM_SQUARE.value)
-            exports["portrait"] = card.resize(AspectRatio.INSTAGRAM_PORTRAIT.value)
-            exports["story"] = card.resize(AspectRatio.INSTAGRAM_STORY.value)
-        elif platform == "twitter":
-            exports["post"] = card.resize(AspectRatio.TWITTER_POST.value)
-        elif platform == "facebook":
-            exports["post"] = card.resize(AspectRatio.FACEBOOK_POST.value)
-            exports["square"] = card.resize(AspectRatio.FACEBOOK_SQUARE.value)
-        else:
-            exports["original"] = card
         
-        return exports
+        # Slajdy niezależne - renderowane równolegle, kolejność zachowana
+        return _map_parallel(render_slide, list(enumerate(slides_content)))
+
+    # Formaty eksportu dla platform (nazwa -> rozmiar)
+    EXPORT_FORMATS: Dict[str, Dict[str, AspectRatio]] = {
+        "linkedin": {
+            "post": AspectRatio.LINKEDIN_POST,
+            "square": AspectRatio.LINKEDIN_SQUARE,
+        },
+        "instagram": {
+            "square": AspectRatio.INSTAGRAM_SQUARE,
+            "portrait": AspectRatio.INSTAGRAM_PORTRAIT,
+            "story": AspectRatio.INSTAGRAM_STORY,
+        },
+        "twitter": {
+            "post": AspectRatio.TWITTER_POST,
+        },
+        "facebook": {
+            "post": AspectRatio.FACEBOOK_POST,
+            "square": AspectRatio.FACEBOOK_SQUARE,
+        },
+    }
+
+    def export_for_platform(
+        self,
+        card: GraphicCard,
+        platform: str,
+        as_palette: bool = False
+    ) -> Dict[str, GraphicCard]:
+        """
+        Eksportuje w formatach dla platformy (skalowania równolegle).
+        as_palette: paleta 8-bit - mniejsze pliki, platformy i tak kompresują ponownie
+        """
+        formats = self.EXPORT_FORMATS.get(platform.lower())
+        if not formats:
+            return {"original": card.quantize() if as_palette else card}
+        
+        def export(ratio: AspectRatio) -> GraphicCard:
+            resized = card.resize(ratio.size)
+            return resized.quantize() if as_palette else resized
+        
+        exported = _map_parallel(export, list(formats.values()))
+        return dict(zip(formats, exported))
 
 
 def create_quick_card(headline: str, style: str = "dark") -> GraphicCard:
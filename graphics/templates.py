@@ -5,10 +5,14 @@ Visual Templates - Szablony wizualne dla grafik
 - Brand palettes
 """
 
+import re
 from dataclasses import dataclass, field
-from typing import List, Tuple, Dict, Optional
+from functools import lru_cache
+from typing import List, Tuple, Dict, Optional, Sequence
 from enum import Enum
 
+import numpy as np
+
 
 class AspectRatio(Enum):
     """Proporcje obrazu dla różnych platform"""
@@ -21,9 +25,39 @@ class AspectRatio(Enum):
     FACEBOOK_POST = (1200, 630)      # 1.91:1
     FACEBOOK_SQUARE = (1200, 1200)   # 1:1
     CAROUSEL_SLIDE = (1080, 1080)    # 1:1
+    
+    def __init__(self, width: int, height: int):
+        # Wymiary jako zwykłe atrybuty - bez rozpakowywania .value przy każdym renderze
+        self.width = width
+        self.height = height
+        self.size = (width, height)
+
+
+@lru_cache(maxsize=256)
+def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
+    """Konwertuje hex na RGB (palety mają kilkanaście kolorów - wynik z cache)"""
+    return tuple(bytes.fromhex(hex_color.lstrip('#')))
+
+
+def hex_to_rgb_batch(hex_colors: Sequence[str]) -> np.ndarray:
+    """Konwertuje listę kolorów hex na tablicę uint8 (N x 3) jednym wywołaniem"""
+    buf = b"".join(bytes.fromhex(color.lstrip('#')) for color in hex_colors)
+    return np.frombuffer(buf, dtype=np.uint8).reshape(-1, 3)
+
+
+# Poprawny kolor palety: #RRGGBB
+_HEX_RE = re.compile(r"#[0-9A-Fa-f]{6}")
+
+# Dwuznakowy zapis hex dla każdej wartości kanału 0-255
+_HEX_BYTE = tuple(f"{i:02x}" for i in range(256))
+
+
+def rgb_to_hex(r: int, g: int, b: int) -> str:
+    """Konwertuje RGB na hex"""
+    return "#" + _HEX_BYTE[r] + _HEX_BYTE[g] + _HEX_BYTE[b]
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ColorPalette:
     """Paleta kolorów"""
     name: str
@@ -37,11 +71,37 @@ class ColorPalette:
     gradient_start: str = ""
     gradient_end: str = ""
     
+    # Kolory jako RGB - liczone raz przy tworzeniu palety
+    _rgb: Dict[str, Tuple[int, int, int]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    
+    COLOR_FIELDS = (
+        "primary", "secondary", "background", "surface",
+        "text_primary", "text_secondary", "accent",
+        "gradient_start", "gradient_end",
+    )
+    
     def __post_init__(self):
+        # Paleta jest niemutowalna - pola domyślne ustawiane przez object.__setattr__
         if not self.gradient_start:
-            self.gradient_start = self.primary
+            object.__setattr__(self, "gradient_start", self.primary)
         if not self.gradient_end:
-            self.gradient_end = self.secondary
+            object.__setattr__(self, "gradient_end", self.secondary)
+        
+        # Walidacja raz przy tworzeniu - błędny kolor nie dotrze do renderowania
+        for name in self.COLOR_FIELDS:
+            value = getattr(self, name)
+            if not _HEX_RE.fullmatch(value):
+                raise ValueError(f"Paleta {self.name!r}: niepoprawny kolor {name}={value!r} (oczekiwano #RRGGBB)")
+        
+        object.__setattr__(
+            self, "_rgb", {name: hex_to_rgb(getattr(self, name)) for name in self.COLOR_FIELDS}
+        )
+    
+    def rgb(self, name: str) -> Tuple[int, int, int]:
+        """Kolor palety jako krotka RGB, np. palette.rgb("accent")"""
+        return self._rgb[name]
 
 
 # === PREDEFINIOWANE PALETY ===
@@ -153,7 +213,7 @@ PALETTES: Dict[str, ColorPalette] = {
 }
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TypographyStyle:
     """Styl typografii"""
     headline_size: int = 72
@@ -168,7 +228,7 @@ class TypographyStyle:
     max_chars_per_line: int = 25
 
 
-@dataclass  
+@dataclass(frozen=True, slots=True)
 class LayoutConfig:
     """Konfiguracja layoutu"""
     padding: int = 80
@@ -188,7 +248,7 @@ class LayoutConfig:
     accent_line_width: int = 4
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class VisualTemplate:
     """Kompletny szablon wizualny"""
     name: str
@@ -357,17 +417,7 @@ def list_palettes() -> List[str]:
     return list(PALETTES.keys())
 
 
-def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
-    """Konwertuje hex na RGB"""
-    hex_color = hex_color.lstrip('#')
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-
-
-def rgb_to_hex(r: int, g: int, b: int) -> str:
-    """Konwertuje RGB na hex"""
-    return f"#{r:02x}{g:02x}{b:02x}"
-
-
+@lru_cache(maxsize=128)
 def create_custom_palette(
     name: str,
     primary: str,
@@ -375,7 +425,11 @@ def create_custom_palette(
     text: str,
     accent: str = None
 ) -> ColorPalette:
-    """Tworzy niestandardową paletę"""
+    """
+    Tworzy niestandardową paletę.
+    Paleta jest niemutowalna i zależy tylko od argumentów, więc ten sam
+    zestaw kolorów marki zwraca instancję z cache. Zmiana koloru to nowy klucz.
+    """
     return ColorPalette(
         name=name,
         primary=primary,